@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""
+Inspectra-Gadget - Benchmarks
+
+Run all benchmarks with 'python benchmarks.py', or a selection with e.g.
+'python benchmarks.py parser sweeps --max-values 1e8'. The soak benchmark of
+live tracking runs for a while and only when asked for, e.g. with
+'python benchmarks.py soak --minutes 10 --rate 500'.
+
+Author: Joeri de Bruijckere
+
+Last updated on Oct 16 2026
+
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import warnings
+import numpy as np
+
+import data_reader
+import simulator
+import filters
+import fused_filters
+
+
+def write_column_file(filepath, n_values, n_columns=4, delimiter=' ',
+                      nan_fraction=0.0, seed=0):
+    # Write a column file in blocks to keep memory usage low for large sizes
+    rng = np.random.default_rng(seed)
+    n_rows = int(n_values)//n_columns
+    block = 10**6
+    with open(filepath, 'w') as f:
+        for start in range(0, n_rows, block):
+            data = rng.normal(size=(min(block, n_rows-start), n_columns))
+            if nan_fraction:
+                data[rng.random(data.shape) < nan_fraction] = np.nan
+            np.savetxt(f, data, delimiter=delimiter, fmt='%.8g')
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter()-start
+
+def benchmark_column_parser(max_values=1e7, threads=(1, os.cpu_count() or 1)):
+    print('Column parser vs. np.genfromtxt')
+    print(f'{"values":>10} {"delim":>5} {"MB":>8} {"genfromtxt (s)":>15} '
+          f'{"parser (s)":>11} {"threads":>7} {"speedup":>8} {"identical":>9}')
+    sizes = [10**p for p in range(5, 9) if 10**p <= float(max_values)]
+    with tempfile.TemporaryDirectory() as folder:
+        for n_values in sizes:
+            for delimiter in ['', ',']:
+                filepath = os.path.join(folder, 'data.dat')
+                write_column_file(filepath, n_values, delimiter=delimiter or ' ',
+                                  nan_fraction=0.01)
+                size = os.path.getsize(filepath)/1e6
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    reference, t_ref = timed(np.genfromtxt, filepath,
+                                             delimiter=delimiter)
+                for n_threads in sorted(set(threads)):
+                    result, t = timed(data_reader.load_columns, filepath,
+                                      delimiter, n_threads)
+                    identical = np.array_equal(result, reference, equal_nan=True)
+                    print(f'{n_values:>10.0e} {repr(delimiter):>5} {size:>8.1f} '
+                          f'{t_ref:>15.3f} {t:>11.3f} {n_threads:>7} '
+                          f'{t_ref/t:>7.1f}x {str(identical):>9}')
+                del reference
+
+def legacy_reshape(column_data, columns):
+    # Shape detection and reshaping of load_and_reshape_data before it was 
+    # replaced by data_reader.GridReshaper, used as a reference
+    unique_values, unique_indices = np.unique(column_data[:,columns[0]], 
+                                              return_index=True)
+    if len(unique_values) > 1:
+        sorted_indices = sorted(unique_indices)
+        if len(column_data[sorted_indices[-1]::,0]) < sorted_indices[1]:
+            data_shape = (len(unique_values)-1, sorted_indices[1])
+        else:
+            data_shape = (len(unique_values), sorted_indices[1])
+    else:
+        data_shape = (1, column_data.shape[0])
+    if data_shape[0] > 1:
+        _, next_unique_indices = np.unique(column_data[:,columns[1]], 
+                                           return_index=True)
+        if ((np.array_equal(unique_indices, next_unique_indices) or
+             np.array_equal(unique_indices, next_unique_indices[::-1])) and
+            (column_data[1,columns[1]] == column_data[0,columns[1]])):
+            columns[1] += 1
+            if len(columns) > 2 and columns[1] == columns[2]:
+                columns[2] += 1
+        if column_data[1,columns[0]] != column_data[0,columns[0]] or len(columns) == 2:
+            raw_data = [column_data[:,x] for x in range(column_data.shape[1])]            
+            columns = columns[:2]
+        else: 
+            if unique_values[1] < unique_values[0]: 
+                column_data = np.flipud(column_data)
+            raw_data = [np.reshape(column_data[:data_shape[0]*data_shape[1],x], data_shape) 
+                        for x in range(column_data.shape[1])]
+            if raw_data[1][0,0] > raw_data[1][0,1]: 
+                raw_data = [np.fliplr(raw_data[x]) for x in range(column_data.shape[1])]
+    else:
+        raw_data = [np.tile(column_data[:data_shape[1],x], (2,1)) for x in range(column_data.shape[1])]    
+        if len(unique_values) > 1:
+            raw_data[columns[0]][0,:] = unique_values[0]
+            raw_data[columns[0]][1,:] = unique_values[1]
+        else:
+            raw_data[columns[0]][0,:] = unique_values[0]-1
+            raw_data[columns[0]][1,:] = unique_values[0]+1
+    return raw_data, columns
+
+def make_sweeps(n_sweeps, sweep_length, n_rows=None, reverse_x=False, 
+                reverse_y=False, simultaneous=False, seed=0):
+    # Columns of a synthetic measurement: x (slow), [x2 (slow),] y (fast), z
+    rng = np.random.default_rng(seed)
+    x = np.repeat(np.linspace(-1, 1, n_sweeps), sweep_length)
+    y = np.tile(np.linspace(0, 2, sweep_length), n_sweeps)
+    if reverse_x:
+        x = x[::-1]
+    if reverse_y:
+        y = -y
+    columns = [x, 0.5*x+3, y] if simultaneous else [x, y]
+    columns.append(rng.normal(size=len(x)))
+    column_data = np.column_stack(columns)
+    return column_data[:n_rows] if n_rows else column_data
+
+SWEEP_LAYOUTS = {
+    'raster': dict(n_sweeps=40, sweep_length=50),
+    'reversed x': dict(n_sweeps=40, sweep_length=50, reverse_x=True),
+    'reversed y': dict(n_sweeps=40, sweep_length=50, reverse_y=True),
+    'simultaneous': dict(n_sweeps=40, sweep_length=50, simultaneous=True),
+    'unfinished last sweep': dict(n_sweeps=40, sweep_length=50, n_rows=1234),
+    'unfinished second sweep': dict(n_sweeps=40, sweep_length=50, n_rows=77),
+    'unfinished first sweep': dict(n_sweeps=40, sweep_length=50, n_rows=33),
+    'single-point sweeps': dict(n_sweeps=500, sweep_length=1),
+    'two sweeps': dict(n_sweeps=2, sweep_length=50),
+}
+
+def check_sweep_detection(column_data, columns):
+    # Compare the shape, columns and complete sweeps of GridReshaper with the
+    # legacy reshaping. The unfinished last sweep, which legacy reshaping 
+    # drops (or tiles from the first sweep), is not compared.
+    reference, reference_columns = legacy_reshape(column_data, columns.copy())
+    reshaper = data_reader.GridReshaper(columns)
+    raw_data = reshaper.reshape(data_reader.ColumnData(array=column_data))
+    if reshaper.columns != reference_columns:
+        return False
+    if reshaper.dimension == 2 and reference[0].ndim == 2:
+        # 2D data with a single finished sweep is no longer tiled
+        reference = [column_data[:,x] for x in range(column_data.shape[1])]
+    for x in reshaper.columns:
+        data, reference_data = raw_data[x], reference[x]
+        if data.ndim != reference_data.ndim:
+            return False
+        if data.ndim == 2:
+            tiled = (len(reference_data) == 2 and x != reshaper.columns[0] and
+                     np.array_equal(reference_data[0], reference_data[1]))
+            if reshaper.sweep_length is None or tiled:
+                data, reference_data = data[:1], reference_data[:1]
+            elif data.shape[0] != reference_data.shape[0]:
+                data = data[:reference_data.shape[0]]
+        if not np.array_equal(data, reference_data, equal_nan=True):
+            return False
+    return True
+
+def benchmark_sweep_detection(max_values=1e7):
+    print('Sweep detection of GridReshaper vs. legacy np.unique')
+    for name, layout in SWEEP_LAYOUTS.items():
+        column_data = make_sweeps(**layout)
+        columns = [0,1,2] if column_data.shape[1] == 3 else [0,1,3]
+        for n_columns in (3, 2):
+            print(f'{name+f" ({n_columns} columns)":>36}: '
+                  f'{check_sweep_detection(column_data, columns[:n_columns])}')
+    print(f'{"rows":>10} {"legacy (s)":>11} {"reshaper (s)":>13} {"speedup":>8}')
+    sizes = [10**p for p in range(5, 9) if 3*10**p <= float(max_values)]
+    for n_rows in sizes:
+        column_data = make_sweeps(n_rows//1000, 1000, n_rows=n_rows-500)
+        _, t_ref = timed(legacy_reshape, column_data, [0,1,2])
+        column_data = data_reader.ColumnData(array=column_data)
+        reshape = lambda: [data for data in data_reader.GridReshaper([0,1,2]).reshape(column_data)]
+        _, t = timed(reshape)
+        print(f'{n_rows:>10.0e} {t_ref:>11.3f} {t:>13.3f} {t_ref/t:>7.1f}x')
+
+FUSED_CHAINS = {'unit conversion': [('Divide', 'Z', '1000'), ('Multiply', 'Z', 'e^2/h'),
+                                     ('Offset', 'Z', '0.5')],
+                'log-like': [('Offset', 'Z', '2'), ('Absolute', '', ''), ('Root', '', '2'),
+                             ('Invert', 'Z', '')]}
+FILTER_FUNCTIONS = {'Offset': filters.offset, 'Multiply': filters.multiply,
+                    'Divide': filters.divide, 'Absolute': filters.absolute,
+                    'Root': filters.root, 'Invert': filters.invert}
+
+def apply_filters_separately(filter_list, data):
+    # As before fused_filters.py: each filter on a copy of the previous result
+    for filt in filter_list:
+        data = [np.array(array) for array in data]
+        data = filt.function(data, filt.method, filt.settings[0], filt.settings[1])
+    return data
+
+def benchmark_fused_filters(max_values=1e7):
+    print('Fused element-wise filters vs. separate filters')
+    print(f'{"values":>10} {"chain":>16} {"separate (s)":>13} {"fused (s)":>10} '
+          f'{"backend":>8} {"speedup":>8} {"identical":>9}')
+    backend = 'numexpr' if fused_filters.numexpr_imported else 'numpy'
+    sizes = [10**p for p in range(5, 9) if 3*10**p <= float(max_values)]
+    rng = np.random.default_rng(0)
+    for n_values in sizes:
+        n = int(np.sqrt(n_values))
+        data = [rng.normal(size=(n, n)) for _ in range(3)]
+        for name, chain in FUSED_CHAINS.items():
+            filter_list = [argparse.Namespace(name=filter_name, method=method,
+                                              settings=[setting, ''],
+                                              function=FILTER_FUNCTIONS[filter_name])
+                           for filter_name, method, setting in chain]
+            reference, t_ref = timed(apply_filters_separately, filter_list, data)
+            result, t = timed(fused_filters.apply, filter_list, data)
+            identical = all(np.array_equal(a, b, equal_nan=True)
+                            for a, b in zip(result, reference))
+            print(f'{n*n:>10.0e} {name:>16} {t_ref:>13.3f} {t:>10.3f} {backend:>8} '
+                  f'{t_ref/t:>7.1f}x {str(identical):>9}')
+
+def get_memory_usage():
+    # Resident set size in MB, or the peak resident set size where it is not
+    # available
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1])*os.sysconf('SC_PAGE_SIZE')/1e6
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+        except ImportError:
+            return float('nan')
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak/1e6 if sys.platform == 'darwin' else peak/1e3
+
+def print_percentiles(name, values, unit, scale=1):
+    if values:
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])*scale
+        print(f'{name:>24}: {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} '
+              f'{max(values)*scale:>8.1f} {unit} ({len(values)} samples)')
+    else:
+        print(f'{name:>24}: no samples')
+
+def benchmark_live_tracking(minutes=1, rate=100):
+    # Track a simulated qd measurement, a column file and two 2-column logs, 
+    # one of which is read with a rolling window, in a headless editor while
+    # they are written, and measure the time spent in refreshes, the time 
+    # between writing and showing rows (ingest lag) and the memory usage
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5 import QtCore, QtWidgets
+    import main as inspectra
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    n_rows = int(rate*minutes*60)+1000
+    window = max(1000, n_rows//10) # the window of the log is full after a tenth of the run
+    print(f'Live tracking for {minutes:g} min at {rate:g} rows/s per file')
+    with tempfile.TemporaryDirectory() as folder, warnings.catch_warnings():
+        warnings.simplefilter('ignore') # pcolormesh warns about unfinished sweeps
+        measurements = {
+            'qd': simulator.create_qd_measurement(os.path.join(folder, 'qd'), 'soak', rate,
+                                                  n_rows//100+1, 100),
+            'columns': simulator.MeasurementSimulator(os.path.join(folder, 'columns.dat'), 4,
+                                                      rate, n_rows//200+1, 200),
+            'windowed log': simulator.MeasurementSimulator(os.path.join(folder, 'window.dat'), 
+                                                           2, rate, n_rows, 1000),
+            'log': simulator.MeasurementSimulator(os.path.join(folder, 'log.dat'), 2, rate,
+                                                  n_rows, 1000)}
+        for measurement in measurements.values():
+            measurement.write_rows(1000)
+        editor = inspectra.Editor()
+        editor.open_files([measurement.filepath for measurement in measurements.values()])
+        names = {os.path.abspath(measurement.filepath): name 
+                 for name, measurement in measurements.items()}
+        items = {names[os.path.abspath(editor.file_list.item(index).data.filepath)]: 
+                 editor.file_list.item(index) for index in range(editor.file_list.count())}
+        # Only the last file is loaded when the files are opened
+        items['windowed log'].data.settings['window'] = str(window)
+        for item in items.values():
+            item.setCheckState(QtCore.Qt.Checked)
+            editor.file_list.setCurrentItem(item)
+            editor.track_button_clicked()
+        
+        latencies, lags = [], {name: [] for name in measurements}
+        shown_rows = {name: getattr(item.data, 'measured_data_points', 0) 
+                      for name, item in items.items()}
+        refresh_live_items = editor.refresh_live_items
+        def timed_refresh(due_items):
+            start_time = time.perf_counter()
+            refresh_live_items(due_items)
+            latencies.append(time.perf_counter()-start_time)
+            now = time.monotonic()
+            for item in due_items:
+                name = names[os.path.abspath(item.data.filepath)]
+                if item.data.measured_data_points > shown_rows[name]:
+                    # Age of the oldest row that is shown for the first time
+                    write_time = measurements[name].get_write_time(shown_rows[name])
+                    if write_time is not None:
+                        lags[name].append(now-write_time)
+                    shown_rows[name] = item.data.measured_data_points
+        editor.live_tracker.refresh_items = timed_refresh
+        
+        memory_usage = [get_memory_usage()]
+        memory_timer = QtCore.QTimer()
+        memory_timer.timeout.connect(lambda: memory_usage.append(get_memory_usage()))
+        memory_timer.start(1000)
+        for measurement in measurements.values():
+            measurement.start()
+        QtCore.QTimer.singleShot(int(minutes*60*1000), app.quit)
+        app.exec_()
+        memory_timer.stop()
+        window_rows = getattr(getattr(items['windowed log'].data, 'tail_reader', None), 
+                              'ring_size', None)
+        for measurement in measurements.values():
+            measurement.stop()
+        editor.stop_auto_refresh()
+        editor.close()
+        
+    print(f'{"":>24}  {"p50":>8} {"p95":>8} {"p99":>8} {"max":>8}')
+    print_percentiles('refresh latency', latencies, 'ms', 1e3)
+    for name, values in lags.items():
+        print_percentiles(f'ingest lag {name}', values, 's')
+    for name, measurement in measurements.items():
+        print(f'{"rows shown "+name:>24}: {shown_rows[name]} of {measurement.n_written}')
+    print(f'{"window windowed log":>24}: {window_rows} of {window} rows')
+    half = len(memory_usage)//2
+    print(f'{"memory":>24}: {memory_usage[0]:.0f} MB at start, {memory_usage[-1]:.0f} MB at end, '
+          f'{memory_usage[-1]-memory_usage[half]:+.1f} MB in the second half')
+
+BENCHMARKS = {'parser': benchmark_column_parser,
+              'sweeps': benchmark_sweep_detection,
+              'filters': benchmark_fused_filters}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspectra-Gadget benchmarks')
+    parser.add_argument('names', nargs='*', 
+                        help=f'benchmarks to run: {", ".join(BENCHMARKS)}, soak (default: '
+                              'all but soak)')
+    parser.add_argument('--max-values', type=float, default=1e7,
+                        help='largest number of values in generated data')
+    parser.add_argument('--minutes', type=float, default=1,
+                        help='duration of the soak benchmark')
+    parser.add_argument('--rate', type=float, default=100,
+                        help='rows per second written to each file in the soak benchmark')
+    args = parser.parse_args(argv)
+    for name in args.names or list(BENCHMARKS):
+        if name == 'soak':
+            benchmark_live_tracking(args.minutes, args.rate)
+        elif name in BENCHMARKS:
+            BENCHMARKS[name](max_values=args.max_values)
+        else:
+            parser.error(f'unknown benchmark {name}')
+        print()
+
+if __name__ == '__main__':
+    sys.exit(main())
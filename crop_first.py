@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Inspectra-Gadget - Cropping before the filters in front of a crop
+
+When Crop X or Crop Y comes after filters that commute with it, those
+filters only need the rows (Crop X) or columns (Crop Y) that are kept, plus
+a halo of neighbours for filters such as Smoothen and Sav-Gol. The filters
+are then applied to that region only and the crop selects the kept part,
+which gives the same result as applying the filters in the declared order.
+
+Author: Joeri de Bruijckere
+
+Last updated on Oct 16 2026
+
+"""
+
+import numpy as np
+
+CROP_FILTERS = {'Crop X': 0, 'Crop Y': 1} # Cropped axis of each crop
+AXES = {'X': 0, 'Y': 1, 'Z': 2}
+
+
+def get_kept(crop, data):
+    # Boolean array of the rows (Crop X) or columns (Crop Y) that the crop
+    # keeps, as in filters.crop_x and filters.crop_y, or None if it keeps all
+    axis = CROP_FILTERS[crop.name]
+    if crop.method not in ['Abs', 'Rel']:
+        return None
+    coordinates = data[axis]
+    min_data, max_data = np.min(coordinates), np.max(coordinates)
+    low, high = float(crop.settings[0]), float(crop.settings[1])
+    if not (low < high and max_data > low and min_data < high):
+        return None
+    if crop.method == 'Abs':
+        mask = (coordinates < low) | (coordinates > high)
+    else:
+        mask = (((coordinates >= min_data) & (coordinates <= min_data + abs(low))) |
+                ((coordinates <= max_data) & (coordinates >= max_data - abs(high))))
+    return ~mask.any(axis=1-axis)
+
+def is_evenly_spaced(coordinates):
+    spacing = np.diff(coordinates)
+    return bool((spacing == spacing[0]).all())
+
+def get_halo(filt, axis, data):
+    # Number of neighbours along the cropped axis that filt needs to compute
+    # a value, or None if filt does not commute with cropping that axis
+    name, method, settings = filt.name, filt.method, filt.settings
+    if name in ['Offset', 'Multiply', 'Divide', 'Invert']:
+        return None if min(AXES[method], len(data)-1) == axis else 0
+    elif name in ['Absolute', 'Root', 'Slope']:
+        return 0
+    elif name == 'Smoothen':
+        width = float(settings[axis])
+        if method == 'Gauss':
+            return int(4.0*width+0.5) if width else 0 # radius of ndimage.gaussian_filter
+        return (int(np.ceil(width))+1)//2
+    elif name == 'Sav-Gol':
+        window_length, polyorder = int(settings[0]), int(settings[1])
+        if window_length < polyorder:
+            window_length = polyorder + 1
+        if window_length % 2 == 0:
+            window_length += 1
+        # half a window and one point for the derivative of the axis, but the
+        # edges are fitted to a whole window of points. The edges of all lines
+        # are fitted at once, which does not give exactly the same result for
+        # fewer lines, so the other axis can not be cropped first.
+        return window_length+1 if ('Y' in method) == (axis == 1) else None
+    elif name == 'Derivative':
+        times = [int(settings[0]), int(settings[1])]
+        # the other axis is taken from the first row/column, which has to be
+        # the same for all rows/columns
+        other = data[1-axis]
+        line = other[0,:] if axis == 0 else other[:,0:1]
+        if times[1-axis] and not np.array_equal(other, np.broadcast_to(line, other.shape)):
+            return None
+        return times[axis]
+    elif name == 'Flip':
+        return 0 if {'U-D': 1, 'L-R': 0}[method] != axis else None
+    elif name == 'Subtract':
+        return 0 if {'Hor': 0, 'Ver': 1}[method] == axis else None
+    return None
+
+def apply(filters, start, data, apply_filter_function):
+    # If the filters from start up to a crop commute with it, applies them to
+    # the cropped region (with halo) and returns the index after the crop and
+    # the cropped data, else None
+    end = start
+    while end < len(filters) and filters[end].name not in CROP_FILTERS:
+        end += 1
+    if end == start or end == len(filters) or len(data) != 3:
+        return None
+    if any(not isinstance(array, np.ndarray) or isinstance(array, np.ma.MaskedArray) or
+           array.ndim != 2 or array.shape != data[-1].shape for array in data):
+        return None
+    crop = filters[end]
+    axis = CROP_FILTERS[crop.name]
+    halo = 0
+    for filt in filters[start:end]:
+        filter_halo = get_halo(filt, axis, data)
+        if filter_halo is None:
+            return None
+        halo += filter_halo
+    kept = get_kept(crop, data)
+    if kept is None or not kept.any():
+        return None
+    indices = np.nonzero(kept)[0]
+    low, high = max(0, indices[0]-halo), min(len(kept), indices[-1]+1+halo)
+    if high-low == len(kept):
+        return None
+    if any(filt.name == 'Derivative' for filt in filters[start:end]):
+        # np.gradient uses another formula for evenly spaced coordinates, so
+        # those of the region have to be evenly spaced if the others are
+        coordinates = data[axis][:,0] if axis == 0 else data[axis][0,:]
+        if high-low < 2 or is_evenly_spaced(coordinates) != is_evenly_spaced(coordinates[low:high]):
+            return None
+    region = (slice(low, high), slice(None))[::1 if axis == 0 else -1]
+    data = [array[region] for array in data]
+    for filt in filters[start:end]:
+        data = apply_filter_function(filt, list(data))
+    kept = (kept[low:high], slice(None))[::1 if axis == 0 else -1]
+    return end+1, [array[kept] for array in data]
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Inspectra-Gadget - Binary sidecar cache of parsed data files
+
+Author: Joeri de Bruijckere
+
+Last updated on Oct 16 2026
+
+"""
+
+import os
+import glob
+import time
+import hashlib
+import numpy as np
+
+# Cache settings
+CACHE_ENABLED = True
+CACHE_FOLDER = os.path.join(os.environ.get('LOCALAPPDATA') or
+                            os.environ.get('XDG_CACHE_HOME') or
+                            os.path.join(os.path.expanduser('~'), '.cache'),
+                            'inspectra-gadget')
+CACHE_MAX_SIZE = 4*1024**3 # Total size of the cache in bytes; oldest entries are removed first
+CACHE_MIN_FILE_SIZE = 1024**2 # Smaller files are parsed quickly enough
+CACHE_MIN_AGE = 60 # Files modified less than this many seconds ago are probably live and are not cached
+
+
+def get_key(filepath, delimiter=''):
+    path = os.path.normcase(os.path.abspath(filepath))
+    return hashlib.sha1(f'{path}|{delimiter}'.encode()).hexdigest()[:20]
+
+def get_sidecar_prefix(filepath, delimiter, file_stat):
+    # Sidecars are keyed on path, delimiter, size and modification time
+    key = get_key(filepath, delimiter)
+    return os.path.join(CACHE_FOLDER, f'{key}_{file_stat.st_size}_{file_stat.st_mtime_ns}_')
+
+def load(filepath, delimiter=''):
+    # Returns (columns, offset, n_columns) with columns a dict of memory-mapped
+    # arrays of the columns that were cached, or None. The offset is the number 
+    # of bytes of the source file that were parsed.
+    if not CACHE_ENABLED:
+        return None
+    try:
+        file_stat = os.stat(filepath)
+    except OSError:
+        return None
+    prefix = get_sidecar_prefix(filepath, delimiter, file_stat)
+    columns, offset, n_columns = {}, None, None
+    for sidecar in glob.glob(os.path.join(CACHE_FOLDER, f'{get_key(filepath, delimiter)}_*.npy')):
+        if sidecar.startswith(prefix):
+            try:
+                # Sidecar names end with {offset}_{n_columns}_{column}.npy
+                offset, n_columns, index = map(int, sidecar[len(prefix):-len('.npy')].split('_'))
+                columns[index] = np.load(sidecar, mmap_mode='r')
+                os.utime(sidecar) # mark as recently used
+                continue
+            except Exception as e:
+                print(f'Could not load cached data of {filepath}...', e)
+        remove(sidecar) # source file has changed since it was cached
+    if not columns:
+        return None
+    return columns, offset, n_columns
+
+def store(filepath, delimiter, columns, offset, n_columns, file_stat):
+    # Only store files that are large enough and are not being written to
+    if (not CACHE_ENABLED or file_stat.st_size < CACHE_MIN_FILE_SIZE or
+        time.time()-file_stat.st_mtime < CACHE_MIN_AGE):
+        return False
+    try:
+        os.makedirs(CACHE_FOLDER, exist_ok=True)
+        prefix = get_sidecar_prefix(filepath, delimiter, file_stat)
+        for index, column in columns.items():
+            sidecar = f'{prefix}{offset}_{n_columns}_{index}.npy'
+            temporary_file = f'{sidecar}.{os.getpid()}.tmp'
+            with open(temporary_file, 'wb') as f:
+                np.save(f, column)
+            os.replace(temporary_file, sidecar) # atomic, safe for other instances
+        evict()
+        return True
+    except Exception as e:
+        print(f'Could not cache data of {filepath}...', e)
+        return False
+
+def evict(max_size=None):
+    # Remove least recently used sidecars until the cache fits in max_size
+    if max_size is None:
+        max_size = CACHE_MAX_SIZE
+    sidecars = []
+    for sidecar in glob.glob(os.path.join(CACHE_FOLDER, '*.npy')):
+        try:
+            sidecar_stat = os.stat(sidecar)
+            sidecars.append((sidecar_stat.st_mtime, sidecar_stat.st_size, sidecar))
+        except OSError:
+            pass
+    total_size = sum(size for _, size, _ in sidecars)
+    for _, size, sidecar in sorted(sidecars):
+        if total_size <= max_size:
+            break
+        if remove(sidecar):
+            total_size -= size
+
+def remove(sidecar):
+    try:
+        os.remove(sidecar)
+        return True
+    except OSError: # e.g. still memory-mapped by another instance on Windows
+        return False
+
+def clear():
+    for sidecar in glob.glob(os.path.join(CACHE_FOLDER, '*.npy')):
+        remove(sidecar)
@@ -0,0 +1,606 @@
+# -*- coding: utf-8 -*-
+"""
+Inspectra-Gadget - Reading of column-based data files
+
+Author: Joeri de Bruijckere
+
+Last updated on Oct 16 2026
+
+"""
+
+import os
+import io
+import time
+import warnings
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+import data_cache
+import regrid
+
+INITIAL_CAPACITY = 1024 # Number of rows allocated when the first data is read
+PARSER_CHUNK_SIZE = 2**20 # Number of bytes parsed at once (1 MB); the GIL is held while a chunk is parsed
+PARSER_THREADS = 1 # Number of threads used to parse chunks of large files
+FINISHED_MIN_AGE = 60 # Files not modified for this many seconds are considered finished
+SWEEP_JITTER_TOLERANCE = 0.1 # Maximum change of a setpoint within a sweep, as a fraction of its step between sweeps
+
+generations = itertools.count() # identifies the contents read by a reader since its last reset
+
+
+def parse_lines(text, delimiter='', usecols=None, threads=PARSER_THREADS):
+    # Parse complete lines of a bare column-based file into a (rows, columns) 
+    # array. Uses the C parser of np.loadtxt on chunks that are split at line 
+    # ends, and falls back to np.genfromtxt for anything that loadtxt does not 
+    # accept (missing values, ragged rows, non-numeric entries, ...), so that 
+    # the result is always identical to that of np.genfromtxt. If usecols is 
+    # given, only those columns are converted.
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore') # empty input gives a warning
+        try:
+            chunks = split_into_chunks(text)
+            if threads > 1 and len(chunks) > 1:
+                with ThreadPoolExecutor(threads) as pool:
+                    arrays = list(pool.map(lambda chunk: load_chunk(chunk, delimiter, usecols), 
+                                           chunks))
+            else:
+                arrays = [load_chunk(chunk, delimiter, usecols) for chunk in chunks]
+            arrays = [array for array in arrays if array.size]
+            if not arrays:
+                return np.empty((0,0))
+            return np.concatenate(arrays) if len(arrays) > 1 else arrays[0]
+        except ValueError:
+            return np.genfromtxt(io.BytesIO(text), delimiter=delimiter, 
+                                 usecols=usecols, ndmin=2)
+
+def load_chunk(chunk, delimiter='', usecols=None):
+    return np.loadtxt(io.BytesIO(chunk), delimiter=delimiter or None, 
+                      usecols=usecols, ndmin=2)
+
+def count_columns(text, delimiter=''):
+    # Number of columns of the first line with data
+    start = 0
+    while start < len(text):
+        end = text.find(b'\n', start)+1 or len(text)
+        row = parse_lines(text[start:end], delimiter)
+        if row.size:
+            return row.shape[1]
+        start = end
+    return None
+
+def split_into_chunks(text, chunk_size=PARSER_CHUNK_SIZE):
+    chunks = []
+    start = 0
+    while len(text)-start > chunk_size:
+        end = text.find(b'\n', start+chunk_size)+1
+        if end == 0:
+            break
+        chunks.append(text[start:end])
+        start = end
+    chunks.append(text[start:])
+    return chunks
+
+def get_first_run_length(values, start=0, block_size=2**16):
+    # Length of the first run of equal values, determined from np.diff of the
+    # values after start (values before start are known to be equal), or None
+    # if all values are equal. Values are scanned in blocks, so that the scan
+    # stops at the first change.
+    start = max(0, start-1)
+    while start < len(values)-1:
+        end = min(len(values), start+block_size+1)
+        changes = np.flatnonzero(np.diff(values[start:end]))
+        if changes.size:
+            return start+changes[0]+1
+        start = end-1
+    return None
+
+def get_sweep_length(x, y, tolerance=SWEEP_JITTER_TOLERANCE):
+    # Length of the sweeps of setpoints x with jitter, which change on every 
+    # row. The first sweep ends where y changes direction; the data has sweeps
+    # of that length if y is monotonic within each sweep, and x changes much 
+    # less within a sweep than between sweeps. Returns 0 if the data has no 
+    # such sweeps, or None if this can not be told before more sweeps finish.
+    directions = np.sign(np.diff(y))
+    changes = np.flatnonzero(directions[1:] != directions[:-1])
+    if not changes.size:
+        steps = np.diff(x)
+        return 0 if np.all(steps > 0) or np.all(steps < 0) else None
+    sweep_length = changes[0]+2
+    n_sweeps = len(y)//sweep_length
+    if n_sweeps < 2:
+        return None
+    x_sweeps = np.reshape(x[:n_sweeps*sweep_length], (n_sweeps, sweep_length))
+    y_steps = np.diff(np.reshape(y[:n_sweeps*sweep_length], (n_sweeps, sweep_length)), axis=1)
+    if (np.all(np.all(y_steps > 0, axis=1) | np.all(y_steps < 0, axis=1)) and
+        np.max(np.ptp(x_sweeps, axis=1)) <= 
+        tolerance*np.min(np.abs(np.diff(np.mean(x_sweeps, axis=1))))):
+        return sweep_length
+    return 0
+
+def find_last_lines(f, file_size, n_lines, block_size=2**16):
+    # Byte offset of the start of the last n_lines complete lines of a file
+    end = file_size
+    n_newlines = 0
+    while end > 0:
+        start = max(0, end-block_size)
+        f.seek(start)
+        block = f.read(end-start)
+        position = len(block)
+        while True:
+            position = block.rfind(b'\n', 0, position)
+            if position < 0:
+                break
+            n_newlines += 1
+            if n_newlines == n_lines+1: # the newline before the first of the lines
+                return start+position+1
+        end = start
+    return 0
+
+def read_only_view(array):
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+def load_columns(filepath, delimiter='', threads=PARSER_THREADS):
+    # Drop-in replacement of np.genfromtxt(filepath, delimiter=delimiter)
+    with open(filepath, 'rb') as f:
+        column_data = parse_lines(f.read(), delimiter, threads=threads)
+    if column_data.size == 0:
+        return np.array([])
+    return np.squeeze(column_data)
+
+
+class TailReader:
+    # Append-only reader for files that grow during a measurement. Only the
+    # bytes that were appended since the previous call of read() are parsed,
+    # and only for the columns that are in use; other columns are parsed when 
+    # they are first accessed. Each column is stored in an array in memory 
+    # that doubles its capacity when full, so that growing it is amortized 
+    # O(new rows). Only once the file has been cached in sidecars (see 
+    # data_cache.py) are the columns memory-mapped.
+    # With a window, only the last window rows of a 2-column file (e.g. a 
+    # long-running log) are kept, in ring buffers of fixed size, and the file 
+    # is read from its last window lines onwards.
+    def __init__(self, filepath, delimiter='', use_cache=True, window=0):
+        self.filepath = filepath
+        self.delimiter = delimiter
+        self.window = window
+        self.use_cache = use_cache and not window
+        self.reset()
+
+    def reset(self):
+        self.generation = next(generations)
+        self.offset = 0 # byte offset just after the last complete line parsed
+        self.last_line = b'' # last complete line parsed (including newline)
+        self.n_rows = 0
+        self.n_columns = None
+        self.columns = {} # column index -> array with at least n_rows values
+        self.partial_row = None # values of a last line without newline (see read)
+        self.ring_size = None # size of the ring buffers, if the window is used
+
+    def read(self, usecols=None, finished=False):
+        # Parse the lines that were appended since the previous call, and the 
+        # columns in usecols (default: all) that were not parsed before. A last
+        # line without newline may be half-written, so it is only shown if the
+        # file is finished (see parse_partial_line).
+        if self.offset == 0 and self.use_cache:
+            self.load_from_cache()
+        if self.n_columns:
+            self.load_columns(usecols)
+        with open(self.filepath, 'rb') as f:
+            file_stat = self.seek_to_offset(f)
+            parse_whole_file = self.offset == 0
+            if parse_whole_file and self.window:
+                self.skip_to_window(f, file_stat)
+            # Parse the new bytes block by block, so that the text of large 
+            # files is never held in memory as a whole
+            partial_line = b''
+            for block in self.read_blocks(f):
+                new_bytes = partial_line+block
+                end = new_bytes.rfind(b'\n')+1
+                complete_lines, partial_line = new_bytes[:end], new_bytes[end:]
+                if complete_lines:
+                    if not self.n_columns:
+                        self.n_columns = count_columns(complete_lines, self.delimiter)
+                    if self.n_columns:
+                        if not self.columns:
+                            self.init_columns(usecols)
+                        rows = parse_lines(complete_lines, self.delimiter, 
+                                           sorted(self.columns))
+                        if rows.size: # not only empty lines
+                            self.append_rows(rows)
+                    self.offset += end
+                    self.last_line = complete_lines[complete_lines.rfind(b'\n', 0, -1)+1:]
+        finished = finished or time.time()-file_stat.st_mtime >= FINISHED_MIN_AGE
+        self.partial_row = self.parse_partial_line(partial_line) if finished else None
+        if parse_whole_file:
+            self.store_in_cache(self.columns, file_stat)
+        return ColumnData(self)
+
+    def read_blocks(self, f, end=None):
+        block_size = PARSER_CHUNK_SIZE*max(1, PARSER_THREADS)
+        while True:
+            if end is not None:
+                block_size = min(block_size, end-f.tell())
+            block = f.read(block_size)
+            if not block:
+                break
+            yield block
+
+    def seek_to_offset(self, f):
+        file_stat = os.fstat(f.fileno())
+        if self.offset:
+            # Start over if the file was truncated or replaced
+            if file_stat.st_size < self.offset:
+                self.reset()
+            else:
+                f.seek(self.offset-len(self.last_line))
+                if f.read(len(self.last_line)) != self.last_line:
+                    self.reset()
+        f.seek(self.offset)
+        return file_stat
+
+    def skip_to_window(self, f, file_stat):
+        # Start at the last window lines of a 2-column file
+        head = f.read(PARSER_CHUNK_SIZE)
+        end = head.rfind(b'\n')+1
+        if end and count_columns(head[:end], self.delimiter) == 2:
+            start = find_last_lines(f, file_stat.st_size, self.window)
+            if start > 0:
+                f.seek(max(0, start-2**16))
+                lines = f.read(start-f.tell())
+                self.offset = start
+                self.last_line = lines[lines.rfind(b'\n', 0, -1)+1:]
+        f.seek(self.offset)
+
+    def get_valid_columns(self, usecols=None):
+        if usecols is None:
+            return list(range(self.n_columns))
+        return sorted(set(index for index in usecols if 0 <= index < self.n_columns)) or [0]
+
+    def init_columns(self, usecols=None):
+        if self.window and self.n_columns == 2:
+            self.ring_size = self.window
+            usecols = None
+        for index in self.get_valid_columns(usecols):
+            self.columns[index] = np.empty(self.ring_size or INITIAL_CAPACITY)
+
+    def load_columns(self, usecols=None):
+        # Parse columns that were not parsed before from the part of the file 
+        # that has been read already
+        missing = [index for index in self.get_valid_columns(usecols) 
+                   if index not in self.columns]
+        if not missing:
+            return
+        new_columns = {index: np.empty(max(INITIAL_CAPACITY, self.n_rows)) 
+                       for index in missing}
+        n_rows = 0
+        with open(self.filepath, 'rb') as f:
+            file_stat = os.fstat(f.fileno())
+            partial_line = b''
+            for block in self.read_blocks(f, end=self.offset):
+                new_bytes = partial_line+block
+                end = new_bytes.rfind(b'\n')+1
+                complete_lines, partial_line = new_bytes[:end], new_bytes[end:]
+                if complete_lines:
+                    rows = parse_lines(complete_lines, self.delimiter, missing)
+                    if not rows.size:
+                        continue
+                    for i, index in enumerate(missing):
+                        new_columns[index][n_rows:n_rows+rows.shape[0]] = rows[:,i]
+                    n_rows += rows.shape[0]
+        if n_rows != self.n_rows: # file was replaced in the meantime
+            self.reset()
+            return
+        self.columns.update(new_columns)
+        self.store_in_cache(new_columns, file_stat)
+
+    def append_rows(self, rows):
+        n_new = rows.shape[0]
+        if self.ring_size:
+            # Only the last ring_size rows are kept
+            rows = rows[-self.ring_size:]
+            positions = np.arange(self.n_rows+n_new-len(rows), self.n_rows+n_new) % self.ring_size
+            for i, index in enumerate(sorted(self.columns)):
+                self.columns[index][positions] = rows[:,i]
+            self.n_rows += n_new
+            return
+        self.reserve(self.n_rows+n_new)
+        for i, index in enumerate(sorted(self.columns)):
+            self.columns[index][self.n_rows:self.n_rows+n_new] = rows[:,i]
+        self.n_rows += n_new
+
+    def reserve(self, n_rows, indices=None):
+        for index in (self.columns if indices is None else indices):
+            column = self.columns[index]
+            if n_rows > len(column):
+                capacity = max(INITIAL_CAPACITY, 2*len(column), n_rows)
+                new_column = np.empty(capacity)
+                new_column[:self.n_rows] = column[:self.n_rows]
+                self.columns[index] = new_column
+
+    def parse_partial_line(self, partial_line):
+        # The last line of a finished file without newline is only shown if it
+        # has a finite value in each column; it is parsed again on the next 
+        # read. The number of columns is only set by complete lines.
+        if not self.n_columns or not partial_line.strip():
+            return None
+        try:
+            row = parse_lines(partial_line, self.delimiter)
+        except ValueError:
+            return None
+        if row.shape == (1, self.n_columns) and np.all(np.isfinite(row)):
+            return row[0]
+        return None
+
+    def get_column(self, index, n_rows, partial_row=None):
+        if index not in self.columns:
+            self.load_columns([index])
+        column = self.columns[index]
+        if self.ring_size:
+            # Copy of the rows in the window, oldest first; rows that were 
+            # overwritten after the snapshot are left out
+            start = max(0, n_rows-self.ring_size, self.n_rows-self.ring_size)
+            column = column[np.arange(start, n_rows) % self.ring_size]
+            if partial_row is not None:
+                column = np.append(column, partial_row[index])
+            return column
+        if partial_row is not None:
+            if n_rows < self.n_rows: # rows were appended after the snapshot
+                return np.append(column[:n_rows], partial_row[index])
+            self.reserve(n_rows+1, [index])
+            column = self.columns[index]
+            column[n_rows] = partial_row[index]
+            n_rows += 1
+        return column[:n_rows]
+
+    def load_from_cache(self):
+        # Continue from binary sidecars of an earlier session, if available
+        cached = data_cache.load(self.filepath, self.delimiter)
+        if cached:
+            self.reset()
+            self.columns, self.offset, self.n_columns = cached
+            self.n_rows = len(next(iter(self.columns.values())))
+            with open(self.filepath, 'rb') as f:
+                f.seek(max(0, self.offset-2**16))
+                lines = f.read(self.offset-f.tell())
+            self.last_line = lines[lines.rfind(b'\n', 0, -1)+1:]
+
+    def store_in_cache(self, columns, file_stat):
+        if self.use_cache and self.n_rows and columns:
+            columns = {index: column[:self.n_rows] for index, column in columns.items()}
+            if data_cache.store(self.filepath, self.delimiter, columns, 
+                                self.offset, self.n_columns, file_stat):
+                # Continue with the memory-mapped sidecars instead of the 
+                # parsed rows in memory, so that pages can be released
+                cached = data_cache.load(self.filepath, self.delimiter)
+                if cached and cached[1] == self.offset:
+                    self.columns.update(cached[0])
+
+
+class ColumnData:
+    # Snapshot of the data of a file, with the (rows, columns) shape of the 
+    # array returned by np.genfromtxt. Columns are only parsed when accessed.
+    def __init__(self, reader=None, array=None, generation=None):
+        self.reader = reader
+        self.array = array
+        if reader:
+            self.generation = reader.generation
+            self.n_rows = reader.n_rows # number of complete lines
+            self.partial_row = reader.partial_row
+            self.window = reader.ring_size # number of last rows that are kept, or None
+            n_rows = min(self.n_rows, self.window or self.n_rows) + (self.partial_row is not None)
+            self.shape = (n_rows, reader.n_columns or 0)
+        else:
+            # Arrays are only appended to if they have a generation (see 
+            # qcodes_extension.py)
+            self.generation = generation
+            self.window = None
+            self.shape = array.shape if array.ndim == 2 else (1, len(array))
+            self.n_rows = self.shape[0]
+
+    def column(self, index):
+        if self.reader:
+            return self.reader.get_column(index, self.n_rows, self.partial_row)
+        return self.array[:,index]
+
+    def load(self, indices):
+        # Parse several columns in a single pass
+        if self.reader:
+            self.reader.load_columns(indices)
+
+
+class RawData:
+    # List-like access to the raw data of each column, reshaped by the given 
+    # function; columns are reshaped when first accessed and kept afterwards
+    def __init__(self, column_data, reshape):
+        self.column_data = column_data
+        self.reshape = reshape # function of (column, index)
+        self.arrays = {}
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if index not in self.arrays:
+            if not 0 <= index < len(self):
+                raise IndexError('column index out of range')
+            self.arrays[index] = self.reshape(self.column_data.column(index), index)
+        return self.arrays[index]
+
+    def __setitem__(self, index, value):
+        self.arrays[index] = value
+
+    def __len__(self):
+        return self.column_data.shape[1]
+
+    def __iter__(self):
+        self.column_data.load(range(len(self)))
+        return (self[index] for index in range(len(self)))
+
+    def __reduce__(self):
+        # Saved sessions contain a plain list of arrays
+        return (list, (list(self),))
+
+
+class GridReshaper:
+    # Reshapes the columns of a file into grids of (sweeps, points per sweep)
+    # for 3D data. The sweep length, dimension and orientation are determined
+    # once, so that a refresh of a growing file only processes the rows of 
+    # new sweeps. An unfinished last sweep is shown as a row that is padded 
+    # with NaN, with the x- and y-values of the grid. Data that is not a 
+    # rectangular raster is regridded (see regrid.py), either when the regrid
+    # setting is 'auto' and the x-value changes within a sweep (e.g. setpoints
+    # with jitter), or always if a regrid method is given.
+    def __init__(self, columns, regrid_method='auto'):
+        self.requested_columns = columns.copy()
+        self.columns = columns.copy() # columns of x, y (and z) after reshaping
+        self.regrid_method = regrid_method
+        self.generation = None
+        self.n_rows = 0
+        self.sweep_length = None
+        self.dimension = None
+        self.flip_columns = False
+        self.grids = {} # column index -> (buffer of rows, number of complete sweeps in buffer)
+        self.n_checked_sweeps = 0
+        self.irregular = False
+        self.regridder = None
+
+    def is_valid(self, column_data, columns, regrid_method='auto'):
+        # Continue only with the same x- and y-columns and with data that was 
+        # appended to; the z-column may differ
+        return (column_data.generation is not None and 
+                column_data.generation == self.generation and
+                column_data.shape[0] >= self.n_rows and regrid_method == self.regrid_method and
+                (columns[:2], len(columns)) in ((self.columns[:2], len(self.columns)),
+                                                (self.requested_columns[:2], 
+                                                 len(self.requested_columns))))
+
+    def reshape(self, column_data, columns=None):
+        # Returns RawData of the reshaped columns
+        if self.generation is None:
+            self.generation = column_data.generation
+        if (columns and len(columns) == 3 and len(self.columns) == 3 and 
+            columns[:2] == self.columns[:2]):
+            self.columns[2] = columns[2]
+        if self.regrid_method in regrid.REGRID_METHODS and len(self.columns) == 3:
+            self.n_rows = column_data.shape[0]
+            return self.regrid_data(column_data, self.regrid_method)
+        x_column = self.columns[0]
+        if self.sweep_length is None:
+            # The first sweep has finished when the first x-value changes; only
+            # complete lines that were not scanned before are scanned
+            x = column_data.column(x_column)[:column_data.n_rows]
+            self.sweep_length = get_first_run_length(x, min(self.n_rows, column_data.n_rows))
+        self.n_rows = column_data.shape[0]
+        
+        if self.sweep_length is not None and self.dimension is None:
+            self.determine_dimension(column_data)
+        if self.dimension == 2:
+            return RawData(column_data, lambda data, index: data)
+        if self.dimension == 3 and self.regrid_method == 'auto':
+            self.check_sweeps(column_data)
+            if self.irregular:
+                return self.regrid_data(column_data, 'bin')
+        
+        n_sweeps, n_points = divmod(self.n_rows, self.sweep_length or self.n_rows)
+        if (self.sweep_length is None or self.dimension is None or 
+            (n_sweeps < 2 and n_points == 0)):
+            # If the first sweep is not finished, duplicate its data and set 
+            # the duplicate x-values to -1 and +1 of the actual value to 
+            # enable 3D plotting
+            def reshape(data, index):
+                data = np.tile(data, (2,1))
+                if index == x_column:
+                    data[0,:] -= 1
+                    data[1,:] += 1
+                return data
+        else:
+            def reshape(data, index):
+                if n_points:
+                    grid = self.get_grid(data, index, n_sweeps, n_points)
+                else:
+                    grid = np.reshape(data[:n_sweeps*self.sweep_length], 
+                                      (n_sweeps, self.sweep_length))
+                return grid[:,::-1] if self.flip_columns else grid
+        return RawData(column_data, reshape)
+    
+    def determine_dimension(self, column_data):
+        # If the second column changes along with the first column, skip it.
+        # Relevant for measurements where two parameters are swept simultaneously.
+        y = column_data.column(self.columns[1])[:column_data.n_rows]
+        if self.sweep_length > 1 and get_first_run_length(y) == self.sweep_length:
+            self.columns[1] += 1
+            if len(self.columns) > 2 and self.columns[1] == self.columns[2]:
+                self.columns[2] += 1
+        if self.sweep_length == 1 and len(self.columns) == 3:
+            # The x-value changes on every row for setpoints with jitter; the
+            # sweeps are then found from y. The dimension is determined again
+            # on the next reshape if fewer than two sweeps have finished.
+            x = column_data.column(self.columns[0])[:column_data.n_rows]
+            sweep_length = get_sweep_length(x, y)
+            if sweep_length is None:
+                return
+            self.sweep_length = sweep_length or 1
+        if self.sweep_length == 1 or len(self.columns) == 2:
+            self.dimension = 2
+            self.columns = self.columns[:2]
+            return
+        self.dimension = 3
+        # flip if second column is sorted from high to low
+        y = column_data.column(1)
+        self.flip_columns = y[0] > y[1]
+
+    def check_sweeps(self, column_data):
+        # The data is not a rectangular raster if the x-value changes within a
+        # sweep; sweeps that were checked before are not checked again
+        x = column_data.column(self.columns[0])[:column_data.n_rows]
+        n_sweeps = len(x)//self.sweep_length
+        sweeps = np.reshape(x[self.n_checked_sweeps*self.sweep_length:n_sweeps*self.sweep_length],
+                            (-1, self.sweep_length))
+        last_sweep = x[n_sweeps*self.sweep_length:]
+        if (not np.all((sweeps == sweeps[:,:1]) | np.isnan(sweeps)) or 
+            not np.all((last_sweep == last_sweep[:1]) | np.isnan(last_sweep))):
+            self.irregular = True
+        self.n_checked_sweeps = n_sweeps
+
+    def regrid_data(self, column_data, method):
+        # Regrid the complete lines; the grid is kept for other columns and 
+        # updated with appended lines on later calls
+        x_column, y_column = self.columns[:2]
+        if self.regridder is None:
+            self.regridder = regrid.Regridder(method)
+        self.regridder.update(column_data.column(x_column)[:column_data.n_rows],
+                              column_data.column(y_column)[:column_data.n_rows])
+        x, y = self.regridder.get_grid()
+        regridder = self.regridder
+        def reshape(data, index):
+            if index == x_column:
+                return x
+            elif index == y_column:
+                return y
+            return regridder.regrid(data)
+        return RawData(column_data, reshape)
+
+    def get_grid(self, data, index, n_sweeps, n_points):
+        # Copy complete sweeps that were not copied before into the buffer of
+        # this column, and pad the unfinished sweep
+        sweep_length = self.sweep_length
+        buffer, n_copied = self.grids.get(index, (np.empty((0, sweep_length)), 0))
+        if n_copied > n_sweeps: # data of an earlier refresh
+            buffer, n_copied = np.empty((0, sweep_length)), 0
+        if n_sweeps+1 > buffer.shape[0]:
+            new_buffer = np.empty((max(4, 2*buffer.shape[0], n_sweeps+1), sweep_length))
+            new_buffer[:n_copied] = buffer[:n_copied]
+            buffer = new_buffer
+        buffer[n_copied:n_sweeps] = np.reshape(data[n_copied*sweep_length:n_sweeps*sweep_length], 
+                                                (n_sweeps-n_copied, sweep_length))
+        self.grids[index] = (buffer, n_sweeps)
+        last_row = buffer[n_sweeps]
+        last_row[:n_points] = data[n_sweeps*sweep_length:n_sweeps*sweep_length+n_points]
+        if index == self.columns[0]:
+            last_row[n_points:] = last_row[0]
+        elif index == self.columns[1]:
+            last_row[n_points:] = buffer[n_sweeps-1,n_points:]
+        else:
+            last_row[n_points:] = np.nan
+        return buffer[:n_sweeps+1]
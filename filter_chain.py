@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Inspectra-Gadget - Cached application of chains of filters
+
+Author: Joeri de Bruijckere
+
+Last updated on Oct 16 2026
+
+"""
+
+import itertools
+import weakref
+from collections import OrderedDict
+import numpy as np
+
+import data_reader
+import fused_filters
+import crop_first
+
+FILTER_CACHE_MAX_SIZE = 1024**3 # Total size of cached intermediate results in bytes; least recently used are removed first
+CROP_FIRST = True # Apply the filters in front of Crop X/Y only to the region that is kept (see crop_first.py)
+
+data_versions = itertools.count() # identifies the data loaded by a data object (see main.py)
+tokens = itertools.count() # identifies a FilterChain
+
+
+def get_owner(array):
+    # Array that owns the memory of a (view of an) array
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+def get_spec(filt):
+    return (filt.name, filt.method, tuple(filt.settings))
+
+def get_kind(filt, n_arrays):
+    # 'Axes' for filters that only transform the axes, 'Values' for filters
+    # that only change the values, independently of the axes, else 'All'
+    metadata = filt.DEFAULT_SETTINGS[filt.name]
+    changes = filt.get_changes(n_arrays)
+    if not metadata['Shape Preserving']:
+        return 'All'
+    if changes == 'Axes' or (changes == 'Values' and not metadata['Uses Axes']):
+        return changes
+    return 'All'
+
+
+class StageCache:
+    # Results of the first filters of chains, shared by all chains so that
+    # their total size can be limited. The size of a result only includes the
+    # arrays that are not in the result of the previous filter.
+    def __init__(self, max_size=FILTER_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict() # key -> (data, size)
+        self.size = 0
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+        return None
+
+    def put(self, key, data, previous_data=None):
+        previous_owners = set(id(get_owner(array)) for array in previous_data or [])
+        owners = {id(get_owner(array)): get_owner(array) for array in data}
+        size = sum(owner.nbytes for key_id, owner in owners.items()
+                   if key_id not in previous_owners)
+        if size > self.max_size:
+            return
+        self.remove(key)
+        self.entries[key] = (data, size)
+        self.size += size
+        while self.size > self.max_size:
+            _, (_, removed_size) = self.entries.popitem(last=False)
+            self.size -= removed_size
+
+    def remove(self, key):
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[1]
+
+    def remove_chain(self, token):
+        for key in [key for key in self.entries if key[0] == token]:
+            self.remove(key)
+
+stage_cache = StageCache()
+
+
+class FilterChain:
+    # Applies the checked filters of a data object to its input data (the
+    # processed data before filtering) and caches the result after each filter,
+    # keyed on the input and the filters up to that one. When a filter is
+    # edited, the filters before it are not applied again. When only filters
+    # of the axes changed, the values of the previous result are reused and
+    # only the axes are transformed again. Runs of element-wise filters are 
+    # evaluated in one pass (see fused_filters.py) and cached as a single step,
+    # as are filters that are applied to the region kept by a crop after them
+    # (see crop_first.py). Cached results are read-only views; filters that 
+    # work in place copy them first (see BaseClassData.apply_filter_function
+    # in main.py).
+    def __init__(self):
+        self.token = next(tokens)
+        self.input_key = None
+        self.input_data = None
+        self.last_specs = None
+        self.last_kinds = None
+        weakref.finalize(self, stage_cache.remove_chain, self.token)
+
+    def apply(self, input_key, input_data, filters, apply_filter_function):
+        # input_data is only used if input_key differs from the previous call
+        if input_key != self.input_key:
+            stage_cache.remove_chain(self.token)
+            self.input_key = input_key
+            self.input_data = [data_reader.read_only_view(data) for data in input_data]
+        specs = [get_spec(filt) for filt in filters if filt.checkstate]
+        checked_filters = [filt for filt in filters if filt.checkstate]
+        kinds = [get_kind(filt, len(self.input_data)) for filt in checked_filters]
+        n_cached, data = 0, self.input_data
+        for n_filters in range(len(specs), 0, -1):
+            cached = stage_cache.get((self.token, tuple(specs[:n_filters])))
+            if cached is not None:
+                n_cached, data = n_filters, cached
+                break
+        previous_specs, previous_kinds = self.last_specs, self.last_kinds
+        self.last_specs, self.last_kinds = specs, kinds
+        if n_cached < len(specs) and previous_specs is not None:
+            new_data = self.apply_axis_filters(data, checked_filters, specs, kinds, n_cached,
+                                               previous_specs, previous_kinds,
+                                               apply_filter_function)
+            if new_data is not None:
+                stage_cache.put((self.token, tuple(specs)), new_data, data)
+                return list(new_data)
+        index = n_cached
+        while index < len(specs):
+            cropped = None
+            if CROP_FIRST:
+                cropped = crop_first.apply(checked_filters, index, data, apply_filter_function)
+            end = fused_filters.get_run_end(checked_filters, index)
+            new_data = None
+            if cropped is not None:
+                end, new_data = cropped
+            elif end-index > 1:
+                new_data = fused_filters.apply(checked_filters[index:end], data)
+            if new_data is None:
+                end = index+1
+                new_data = apply_filter_function(checked_filters[index], list(data))
+            new_data = [data_reader.read_only_view(array) for array in new_data]
+            stage_cache.put((self.token, tuple(specs[:end])), new_data, data)
+            data, index = new_data, end
+        return list(data)
+
+    def apply_axis_filters(self, data, checked_filters, specs, kinds, n_cached, 
+                           previous_specs, previous_kinds, apply_filter_function):
+        # If the filters after the first n_cached ones only transform the axes
+        # or change the values independently of the axes, and the latter are
+        # the same as in the previous call, the values of the previous result
+        # are still valid and only the filters of the axes are applied to data
+        n_common = 0
+        while (n_common < min(len(specs), len(previous_specs)) and 
+               specs[n_common] == previous_specs[n_common]):
+            n_common += 1
+        if ('All' in kinds[min(n_cached, n_common):] or 'All' in previous_kinds[n_common:] or
+            [spec for spec, kind in zip(specs[n_common:], kinds[n_common:]) if kind == 'Values'] !=
+            [spec for spec, kind in zip(previous_specs[n_common:], previous_kinds[n_common:]) 
+             if kind == 'Values']):
+            return None
+        previous_data = stage_cache.get((self.token, tuple(previous_specs)))
+        if previous_data is None:
+            return None
+        axis_filters = [filt for filt, kind in zip(checked_filters[n_cached:], kinds[n_cached:])
+                        if kind == 'Axes']
+        data = list(data)
+        index = 0
+        while index < len(axis_filters):
+            end = fused_filters.get_run_end(axis_filters, index)
+            new_data = fused_filters.apply(axis_filters[index:end], data) if end > index else None
+            if new_data is None:
+                end = index+1
+                new_data = apply_filter_function(axis_filters[index], data)
+            data, index = list(new_data), end
+        return [data_reader.read_only_view(array) for array in data[:-1]]+[previous_data[-1]]
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Inspectra-Gadget - Persistent index of the files in linked folders
+
+Author: Joeri de Bruijckere
+
+Last updated on Oct 16 2026
+
+"""
+
+import os
+import sqlite3
+from collections import namedtuple
+
+import data_cache
+
+INDEX_PATH = os.path.join(data_cache.CACHE_FOLDER, 'folder_index.sqlite')
+INDEX_TIMEOUT = 10 # Seconds to wait for another instance that is writing to the index
+INDEX_VERSION = 1
+
+# An indexed data file; meta is the text of the meta.json file of Matlab qd
+# data, or None
+Entry = namedtuple('Entry', ['path', 'size', 'mtime_ns', 'inode', 'ctime', 'meta'])
+
+def get_creation_time(file_stat):
+    return getattr(file_stat, 'st_birthtime', file_stat.st_ctime)
+
+def get_path_range(folder):
+    # Paths in folder and its subfolders sort between these two strings
+    folder = folder.rstrip(os.sep)
+    return folder+os.sep, folder+chr(ord(os.sep)+1)
+
+def read_meta(filepath):
+    metapath = os.path.join(os.path.dirname(filepath), 'meta.json')
+    if os.path.basename(filepath) == 'data.dat' and os.path.isfile(metapath):
+        with open(metapath) as f:
+            return f.read()
+    return None
+
+
+class FolderIndex:
+    # Paths, sizes, modification times and metadata of the data files in
+    # linked folders, and the modification times of the folders, kept in an
+    # SQLite database. When a folder is linked again, only folders with a new
+    # modification time (i.e. files or folders were added or removed) are
+    # listed again, and only the files in them are checked. The database is
+    # in WAL mode, so that several instances can share it.
+    def __init__(self):
+        try:
+            os.makedirs(os.path.dirname(INDEX_PATH), exist_ok=True)
+            self.connection = sqlite3.connect(INDEX_PATH, timeout=INDEX_TIMEOUT)
+            self.create_tables()
+        except (OSError, sqlite3.Error) as e:
+            print('Could not open folder index, it is kept in memory...', e)
+            self.connection = sqlite3.connect(':memory:')
+            self.create_tables()
+
+    def create_tables(self):
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        with self.connection:
+            if self.connection.execute('PRAGMA user_version').fetchone()[0] != INDEX_VERSION:
+                self.connection.execute('DROP TABLE IF EXISTS folders')
+                self.connection.execute('DROP TABLE IF EXISTS files')
+                self.connection.execute(f'PRAGMA user_version={INDEX_VERSION}')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS folders '
+                                    '(path TEXT PRIMARY KEY, mtime_ns INTEGER)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS files '
+                                    '(path TEXT PRIMARY KEY, folder TEXT, size INTEGER, '
+                                    'mtime_ns INTEGER, inode INTEGER, ctime REAL, meta TEXT)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS files_folder ON files (folder)')
+
+    def get_folders(self, root):
+        root = os.path.abspath(root)
+        start, end = get_path_range(root)
+        rows = self.connection.execute('SELECT path, mtime_ns FROM folders WHERE path = ? OR '
+                                       '(path >= ? AND path < ?)', (root, start, end))
+        return dict(rows.fetchall())
+
+    def get_entries(self, root):
+        start, end = get_path_range(os.path.abspath(root))
+        rows = self.connection.execute('SELECT path, size, mtime_ns, inode, ctime, meta FROM files '
+                                       'WHERE path >= ? AND path < ? ORDER BY ctime', (start, end))
+        return [Entry(*row) for row in rows]
+
+    def update(self, root, extension='.dat'):
+        # Brings the index of root up to date and returns its entries, sorted
+        # by creation time
+        root = os.path.abspath(root)
+        folders = self.get_folders(root)
+        changed_folders, removed_folders = [], []
+        for folder, mtime_ns in folders.items():
+            try:
+                if os.stat(folder).st_mtime_ns != mtime_ns:
+                    changed_folders.append(folder)
+            except OSError:
+                removed_folders.append(folder)
+        if root not in folders: # not indexed before
+            changed_folders.append(root)
+        with self.connection:
+            for folder in removed_folders:
+                self.remove_folder(folder)
+            while changed_folders:
+                new_folders = self.update_folder(changed_folders.pop(), folders, extension)
+                changed_folders += new_folders
+                folders.update(dict.fromkeys(new_folders))
+        return self.get_entries(root)
+
+    def update_folder(self, folder, folders, extension):
+        # Returns the subfolders that were not indexed yet
+        try:
+            mtime_ns = os.stat(folder).st_mtime_ns
+            entries = list(os.scandir(folder))
+        except OSError:
+            self.remove_folder(folder)
+            return []
+        self.connection.execute('INSERT OR REPLACE INTO folders VALUES (?, ?)', (folder, mtime_ns))
+        subfolders = [entry.path for entry in entries if entry.is_dir()]
+        filepaths = [entry.path for entry in entries if entry.is_file()
+                     and os.path.splitext(entry.name)[1] == extension]
+        indexed = self.connection.execute('SELECT path FROM files WHERE folder = ?', (folder,))
+        removed = set(row[0] for row in indexed) - set(filepaths)
+        self.connection.executemany('DELETE FROM files WHERE path = ?',
+                                    [(filepath,) for filepath in removed])
+        self.index_files(filepaths)
+        return [subfolder for subfolder in subfolders if subfolder not in folders]
+
+    def remove_folder(self, folder):
+        start, end = get_path_range(folder)
+        for table in ['folders', 'files']:
+            self.connection.execute(f'DELETE FROM {table} WHERE path = ? OR '
+                                    '(path >= ? AND path < ?)', (folder, start, end))
+
+    def update_files(self, filepaths):
+        # Index files that are new or changed, and return the entries of all
+        # files in filepaths that exist
+        with self.connection:
+            return self.index_files(filepaths)
+
+    def index_files(self, filepaths):
+        entries = []
+        for filepath in filepaths:
+            filepath = os.path.abspath(filepath)
+            try:
+                file_stat = os.stat(filepath)
+            except OSError:
+                self.connection.execute('DELETE FROM files WHERE path = ?', (filepath,))
+                continue
+            row = self.connection.execute('SELECT path, size, mtime_ns, inode, ctime, meta '
+                                          'FROM files WHERE path = ?', (filepath,)).fetchone()
+            if (row is None or row[1:4] != (file_stat.st_size, file_stat.st_mtime_ns,
+                                            file_stat.st_ino)):
+                try:
+                    meta = read_meta(filepath)
+                except OSError as e:
+                    print(f'Could not read metadata of {filepath}...', e)
+                    meta = None
+                row = (filepath, file_stat.st_size, file_stat.st_mtime_ns,
+                       file_stat.st_ino, get_creation_time(file_stat), meta)
+                self.connection.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                        (filepath, os.path.dirname(filepath), *row[1:]))
+                # A folder that was not indexed yet is listed on the next update
+                self.connection.execute('INSERT OR IGNORE INTO folders VALUES (?, NULL)',
+                                        (os.path.dirname(filepath),))
+            entries.append(Entry(*row))
+        return entries
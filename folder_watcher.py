@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Inspectra-Gadget - Watching linked folders for new and modified files
+
+Author: Joeri de Bruijckere
+
+Last updated on Oct 16 2026
+
+"""
+
+import os
+import struct
+import ctypes
+import ctypes.util
+from PyQt5 import QtCore
+try: # inotify on Linux
+    libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    libc.inotify_init1
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    inotify_imported = True
+except (OSError, AttributeError):
+    inotify_imported = False
+
+WATCH_EVENT_DELAY = 500 # Events are collected for this many ms before they are passed on
+WATCH_POLL_INTERVAL = 2000 # Interval (ms) at which folders are checked without inotify
+
+# inotify constants (see inotify(7))
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct('iIII') # wd, mask, cookie, len
+
+
+def walk_folders(folder):
+    for subdir, dirs, files in os.walk(folder):
+        yield subdir
+
+def walk_files(folder, extension='.dat'):
+    # Paths of all files with the given extension in folder and its subfolders
+    for subdir, dirs, files in os.walk(folder):
+        for file in files:
+            if os.path.splitext(file)[1] == extension:
+                yield os.path.join(subdir, file)
+
+
+class FolderWatcher(QtCore.QObject):
+    # Emits the paths of files with the given extension that are added to or
+    # modified in a folder or its subfolders. Uses inotify if available, and
+    # otherwise checks the modification times of the folders periodically.
+    # If the subfolders are known (e.g. from folder_index.py), the folder is 
+    # not walked.
+    files_added = QtCore.pyqtSignal(list)
+    files_modified = QtCore.pyqtSignal(list)
+
+    def __init__(self, folder, extension='.dat', folders=None):
+        super().__init__()
+        self.folder = folder
+        self.extension = extension
+        self.folders = folders
+        self.added_files = set()
+        self.modified_files = set()
+        self.event_timer = QtCore.QTimer()
+        self.event_timer.setSingleShot(True)
+        self.event_timer.setInterval(WATCH_EVENT_DELAY)
+        self.event_timer.timeout.connect(self.emit_events)
+        self.backend = None
+        if inotify_imported:
+            try:
+                self.backend = InotifyBackend(self)
+            except OSError as e:
+                print('Could not watch folder with inotify, checking it periodically...', e)
+        if self.backend is None:
+            self.backend = PollingBackend(self)
+
+    def file_added(self, filepath):
+        if os.path.splitext(filepath)[1] == self.extension:
+            self.added_files.add(filepath)
+            self.event_timer.start()
+
+    def file_modified(self, filepath):
+        if os.path.splitext(filepath)[1] == self.extension:
+            self.modified_files.add(filepath)
+            if not self.event_timer.isActive():
+                self.event_timer.start()
+
+    def emit_events(self):
+        added_files, self.added_files = self.added_files, set()
+        modified_files, self.modified_files = self.modified_files-added_files, set()
+        if added_files:
+            self.files_added.emit(sorted(added_files))
+        if modified_files:
+            self.files_modified.emit(sorted(modified_files))
+
+    def stop(self):
+        self.event_timer.stop()
+        self.backend.stop()
+
+
+class InotifyBackend:
+    # Watches every folder in the tree; folders that are created later are
+    # watched and scanned when they appear
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self, watcher):
+        self.watcher = watcher
+        self.folders = {} # watch descriptor -> folder
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        try:
+            for subdir in watcher.folders or walk_folders(watcher.folder):
+                self.add_watch(subdir)
+        except OSError:
+            os.close(self.fd)
+            raise
+        self.notifier = QtCore.QSocketNotifier(self.fd, QtCore.QSocketNotifier.Read)
+        self.notifier.activated.connect(self.read_events)
+
+    def add_watch(self, folder):
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(folder), self.MASK)
+        if wd < 0: # e.g. limit of fs.inotify.max_user_watches reached
+            raise OSError(ctypes.get_errno(), f'{os.strerror(ctypes.get_errno())}: {folder}')
+        self.folders[wd] = folder
+
+    def read_events(self):
+        try:
+            buffer = os.read(self.fd, 2**16)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(buffer[offset:offset+length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_Q_OVERFLOW: # events were lost
+                for filepath in walk_files(self.watcher.folder, self.watcher.extension):
+                    self.watcher.file_added(filepath)
+            elif mask & IN_IGNORED:
+                self.folders.pop(wd, None)
+            elif wd in self.folders:
+                path = os.path.join(self.folders[wd], name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self.add_folder(path)
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    self.watcher.file_added(path)
+                else:
+                    self.watcher.file_modified(path)
+
+    def add_folder(self, folder):
+        # Files may have been created before the watch was added
+        try:
+            for subdir in walk_folders(folder):
+                self.add_watch(subdir)
+        except OSError as e:
+            print(f'Could not watch {folder}...', e)
+        for filepath in walk_files(folder, self.watcher.extension):
+            self.watcher.file_added(filepath)
+
+    def stop(self):
+        self.notifier.setEnabled(False)
+        os.close(self.fd)
+
+
+class PollingBackend:
+    # A folder's modification time changes when files or folders are added
+    # to it, so only folders with a new modification time are listed again.
+    # Modified files are not detected.
+    def __init__(self, watcher):
+        self.watcher = watcher
+        self.folders = {} # folder -> modification time
+        self.files = set()
+        if watcher.folders:
+            # Files that are already there are passed on again when their 
+            # folder changes
+            for subdir in watcher.folders:
+                self.folders[subdir] = self.get_mtime(subdir)
+        else:
+            for subdir, dirs, files in os.walk(watcher.folder):
+                self.folders[subdir] = self.get_mtime(subdir)
+                self.files.update(os.path.join(subdir, file) for file in files)
+        self.timer = QtCore.QTimer()
+        self.timer.timeout.connect(self.poll)
+        self.timer.start(WATCH_POLL_INTERVAL)
+
+    def get_mtime(self, folder):
+        try:
+            return os.stat(folder).st_mtime_ns
+        except OSError:
+            return None
+
+    def poll(self):
+        for folder, mtime in list(self.folders.items()):
+            new_mtime = self.get_mtime(folder)
+            if new_mtime != mtime:
+                self.scan_folder(folder)
+
+    def scan_folder(self, folder):
+        self.folders[folder] = self.get_mtime(folder)
+        try:
+            entries = list(os.scandir(folder))
+        except OSError:
+            del self.folders[folder]
+            return
+        for entry in entries:
+            if entry.is_dir():
+                if entry.path not in self.folders:
+                    self.scan_folder(entry.path)
+            elif entry.path not in self.files:
+                self.files.add(entry.path)
+                self.watcher.file_added(entry.path)
+
+    def stop(self):
+        self.timer.stop()
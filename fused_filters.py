@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Inspectra-Gadget - Fused evaluation of element-wise filters
+
+Consecutive element-wise filters (e.g. Divide, Multiply and Offset of a unit
+conversion) are evaluated in one pass over the data: each array is copied
+block by block into a new array and all operations are applied to a block
+in place while it is in the CPU cache. The results are identical to those
+of the functions in filters.py.
+
+Author: Joeri de Bruijckere
+
+Last updated on Oct 16 2026
+
+"""
+
+import numpy as np
+try: # pip install numexpr
+    import numexpr
+    numexpr_imported = True
+except ImportError:
+    numexpr_imported = False
+
+FUSED_CHUNK_SIZE = 2**14 # Number of elements of an array evaluated at once
+FUSED_FILTERS = ['Offset', 'Multiply', 'Divide', 'Absolute', 'Root', 'Invert'] # Element-wise filters
+NUMEXPR_OPERATIONS = {'add': '({} + {})', 'multiply': '({} * {})', 'divide': '({} / {})',
+                      'absolute': 'abs({})', 'reciprocal': '(1. / {})'} # Operations evaluated by numexpr
+AXES = {'X': 0, 'Y': 1, 'Z': 2}
+
+
+def get_run_end(filters, start):
+    # Index after the run of element-wise filters that starts at start
+    end = start
+    while end < len(filters) and filters[end].name in FUSED_FILTERS:
+        end += 1
+    return end
+
+def get_operations(filt, n_arrays):
+    # Operations (array index, operation, value) of filt on data with n_arrays
+    # arrays, in the same order and with the same values as in filters.py
+    name, method, setting = filt.name, filt.method, filt.settings[0]
+    if name == 'Offset':
+        return [(AXES[method], 'add', float(setting))] if AXES[method] < n_arrays else []
+    elif name == 'Multiply':
+        value = 0.025974 if setting == 'e^2/h' else float(setting)
+        return [(AXES[method], 'multiply', value)] if AXES[method] < n_arrays else []
+    elif name == 'Divide':
+        return [(AXES[method], 'divide', float(setting))] if AXES[method] < n_arrays else []
+    elif name == 'Absolute':
+        return [(n_arrays-1, 'absolute', None)]
+    elif name == 'Root':
+        if float(setting) > 0:
+            return [(n_arrays-1, 'absolute', None), (n_arrays-1, 'power', 1/float(setting))]
+        return []
+    elif name == 'Invert':
+        return [(min(AXES[method], n_arrays-1), 'reciprocal', None)]
+    raise ValueError(f'{name} is not an element-wise filter')
+
+def apply_operation(block, operation, value):
+    if operation == 'add':
+        np.add(block, value, out=block)
+    elif operation == 'multiply':
+        np.multiply(block, value, out=block)
+    elif operation == 'divide':
+        np.divide(block, value, out=block)
+    elif operation == 'absolute':
+        np.absolute(block, out=block)
+    elif operation == 'power':
+        block **= value # ** uses e.g. np.sqrt for 0.5, like filters.root
+    elif operation == 'reciprocal':
+        np.divide(1., block, out=block)
+
+def evaluate(array, operations):
+    # New array with the operations (operation, value) applied to array
+    result = np.empty(array.shape, array.dtype)
+    if (numexpr_imported and array.dtype == np.float64 and
+        all(operation in NUMEXPR_OPERATIONS for operation, _ in operations)):
+        expression, local_dict = 'x', {'x': array}
+        for index, (operation, value) in enumerate(operations):
+            if value is None:
+                expression = NUMEXPR_OPERATIONS[operation].format(expression)
+            else:
+                expression = NUMEXPR_OPERATIONS[operation].format(expression, f'c{index}')
+                local_dict[f'c{index}'] = np.float64(value)
+        numexpr.evaluate(expression, local_dict=local_dict, out=result)
+        return result
+    rows = max(1, FUSED_CHUNK_SIZE//max(1, array.size//max(1, len(array))))
+    for start in range(0, len(array), rows):
+        block = result[start:start+rows]
+        np.copyto(block, array[start:start+rows])
+        for operation, value in operations:
+            apply_operation(block, operation, value)
+    return result
+
+def apply(filters, data):
+    # Applies the element-wise filters to data and returns the new data, or
+    # None if the data can not be evaluated in a fused pass (e.g. masked arrays)
+    operations = {}
+    for filt in filters:
+        for index, operation, value in get_operations(filt, len(data)):
+            operations.setdefault(index, []).append((operation, value))
+    for index in operations:
+        array = data[index]
+        if (not isinstance(array, np.ndarray) or isinstance(array, np.ma.MaskedArray) or
+            array.ndim == 0 or
+            not np.issubdtype(array.dtype, np.floating)):
+            return None
+    return [evaluate(array, operations[index]) if index in operations else array
+            for index, array in enumerate(data)]
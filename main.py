@@ -12,7 +12,9 @@ from PyQt5 import QtWidgets, QtCore, QtGui
 import sys
 import os
 import copy
+import time
 import io
+import weakref
 from stat import ST_CTIME
 import numpy as np
 from scipy.ndimage import map_coordinates
@@ -25,6 +27,7 @@ from matplotlib import cm
 from matplotlib.widgets import Cursor
 from matplotlib import rcParams
 from matplotlib.lines import Line2D
+from matplotlib.collections import QuadMesh
 import matplotlib.patches as patches
 from cycler import cycler
 try: # lmfit is used for fitting the evolution of the properties of multiple peaks 
@@ -52,11 +55,22 @@ except ModuleNotFoundError:
 import design
 import filters
 import fits
+import data_reader
+import workers
+import folder_watcher
+import folder_index
+import refresh_scheduler
+import metrics
+import filter_chain
 
 # UI settings
 DARK_THEME = True
-AUTO_REFRESH_INTERVAL_2D = 1
-AUTO_REFRESH_INTERVAL_3D = 30
+LIVE_REFRESH_MAX_LAG = 2 # Target for the time (s) until new data of a tracked file is shown
+LIVE_REFRESH_MAX_CPU_FRACTION = 0.3 # Target for the fraction of time spent on refreshing tracked files
+LIVE_REFRESH_MIN_INTERVAL = 0.2 # Minimum time (s) between refreshes
+PARALLEL_OPEN_MIN_FILES = 50 # Open at least this many .dat files in worker processes
+OPEN_POLL_INTERVAL = 100 # Interval (ms) at which files opened by workers are added
+FINGERPRINT_SIZE = 4096 # Number of bytes at the end of a file compared to detect changes on refresh
 
 # List of custom presets
 PRESETS = [{'title': '', 'labelsize': '9', 'ticksize': '9', 'spinewidth': '0.5',
@@ -180,6 +194,8 @@ SETTINGS_MENU_OPTIONS['rasterized'] = ['True','False']
 SETTINGS_MENU_OPTIONS['dpi'] = ['figure','300']
 SETTINGS_MENU_OPTIONS['transparent'] = ['True', 'False']
 SETTINGS_MENU_OPTIONS['shading'] = ['auto', 'flat', 'gouraud', 'nearest']
+SETTINGS_MENU_OPTIONS['regrid'] = ['auto', 'bin', 'interpolate', 'False']
+SETTINGS_MENU_OPTIONS['window'] = ['0', '10000', '100000', '1000000']
 
 
 class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
@@ -195,7 +211,17 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
         self.init_connections()
         self.init_canvas()
         self.linked_folder = None
-        self.linked_files = []
+        self.linked_files = set()
+        self.folder_index = None
+        self.folder_watcher = None
+        self.file_opener = None
+        self.data_loader = workers.DataLoader()
+        self.data_loader.loaded.connect(self.data_loaded)
+        self.metrics = metrics.Metrics()
+        self.metrics_server = None
+        self.live_tracker = refresh_scheduler.LiveTracker(
+            self.refresh_live_items, LIVE_REFRESH_MAX_LAG, 
+            LIVE_REFRESH_MAX_CPU_FRACTION, LIVE_REFRESH_MIN_INTERVAL, self.metrics)
     
     def init_plot_settings(self):
         self.settings_table.setColumnCount(2)
@@ -271,6 +297,7 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
         self.action_duplicate_file.triggered.connect(self.duplicate_item)
         self.action_save_data_selected_file.triggered.connect(self.save_processed_data)
         self.track_button.clicked.connect(self.track_button_clicked)
+        self.file_list.currentItemChanged.connect(lambda: self.update_tracking_status())
         self.action_open_files_from_folder.triggered.connect(self.open_files_from_folder)
         self.action_save_files_as_PNG.triggered.connect(lambda: self.save_images_as('.png'))
         self.action_save_files_as_PDF.triggered.connect(lambda: self.save_images_as('.pdf'))
@@ -281,7 +308,7 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
         self.action_refresh_stop.setEnabled(False)
         self.action_link_to_folder.triggered.connect(lambda: self.update_link_to_folder(new_folder=True))
         self.action_unlink_folder.triggered.connect(self.unlink_folder)
-        self.refresh_file_button.clicked.connect(self.refresh_files)
+        self.refresh_file_button.clicked.connect(lambda: self.refresh_files())
         self.up_file_button.clicked.connect(lambda: self.move_file('up'))
         self.down_file_button.clicked.connect(lambda: self.move_file('down'))
         self.file_list.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
@@ -307,7 +334,10 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
         if not filepaths:
             filepaths, _ = QtWidgets.QFileDialog.getOpenFileNames(
                 self, 'Open File', '', 'Data Files (*.dat *.npy *.db)')
-        if filepaths:
+        if (filepaths and len(filepaths) >= PARALLEL_OPEN_MIN_FILES and
+            all(os.path.splitext(filepath)[1] == '.dat' for filepath in filepaths)):
+            self.open_files_in_parallel(filepaths)
+        elif filepaths:
             for filepath in filepaths:
                 try:
                     print(f'Open {filepath}...')
@@ -336,25 +366,55 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
                         else:
                             print('QCoDeS module not imported!')
                     
-                    elif (os.path.basename(filepath) == 'data.dat' and # Matlab qd files
-                          os.path.isfile(os.path.dirname(filepath)+'/meta.json')):
-                        metapath = os.path.dirname(filepath)+'/meta.json'
-                        item = DataItem(qd_extension.QdData(filepath, self.canvas, metapath))
-                        self.file_list.addItem(item)
-                    
-                    else: # bare column-based data file
-                        item = DataItem(BaseClassData(filepath, self.canvas))
+                    else: # Matlab qd files or bare column-based data files
+                        item = DataItem(create_data(filepath, self.canvas))
                         self.file_list.addItem(item)
                 except Exception as e:
                     print(f'Failed to open {filepath}...', e)
-
-            if self.file_list.count() > 0:
-                last_item = self.file_list.item(self.file_list.count()-1)
-                self.file_list.setCurrentItem(last_item)
-                for item_index in range(self.file_list.count()-1):
-                    self.file_list.item(item_index).setCheckState(QtCore.Qt.Unchecked)
-                last_item.setCheckState(QtCore.Qt.Checked)
-                self.file_checked(last_item)
+            self.check_last_item()
+        self.file_list.itemChanged.connect(self.file_checked)
+    
+    def check_last_item(self):
+        if self.file_list.count() > 0:
+            last_item = self.file_list.item(self.file_list.count()-1)
+            self.file_list.setCurrentItem(last_item)
+            for item_index in range(self.file_list.count()-1):
+                self.file_list.item(item_index).setCheckState(QtCore.Qt.Unchecked)
+            last_item.setCheckState(QtCore.Qt.Checked)
+            self.file_checked(last_item)
+    
+    def open_files_in_parallel(self, filepaths):
+        # Files are opened in worker processes and added to the file list in
+        # order as they come in; files that are opened while others are still
+        # being opened are added to the same workers
+        if self.file_opener and not self.file_opener.finished():
+            self.file_opener.add(filepaths)
+            self.open_progress.setMaximum(len(self.file_opener.filepaths))
+            return
+        self.file_opener = workers.FileOpener(filepaths)
+        self.open_progress = QtWidgets.QProgressDialog('Opening files...', 'Cancel', 
+                                                       0, len(filepaths), self)
+        self.open_progress.setMinimumDuration(0)
+        self.open_progress.canceled.connect(self.file_opener.cancel)
+        self.open_timer = QtCore.QTimer()
+        self.open_timer.timeout.connect(self.add_opened_files)
+        self.open_timer.start(OPEN_POLL_INTERVAL)
+    
+    def add_opened_files(self):
+        self.file_list.itemChanged.disconnect(self.file_checked)
+        for filepath, data in self.file_opener.get_results():
+            if isinstance(data, Exception):
+                print(f'Failed to open {filepath}...', data)
+            else:
+                print(f'Open {filepath}...')
+                data.canvas = self.canvas
+                self.file_list.addItem(DataItem(data))
+        if self.file_opener.finished():
+            self.open_timer.stop()
+            self.open_progress.reset()
+            self.check_last_item()
+        elif not self.open_progress.wasCanceled():
+            self.open_progress.setValue(self.file_opener.n_done)
         self.file_list.itemChanged.connect(self.file_checked)
     
     def remove_files(self, which='current'):
@@ -367,9 +427,11 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
             for item in items: 
                 if (item.data.filepath in self.linked_files 
                     and not hasattr(item, 'duplicate')):
-                    self.linked_files.remove(item.data.filepath)
+                    self.linked_files.discard(item.data.filepath)
                 if item.checkState() == 2:
                     update_plots = True
+                if self.live_tracker.is_tracked(item):
+                    self.stop_tracking(item)
                 index = self.file_list.row(item)
                 self.file_list.takeItem(index)
                 del item
@@ -396,14 +458,27 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
     def update_plots(self, update_data=True):
         self.figure.clear()
         checked_items = self.get_checked_items()
+        if update_data:
+            self.data_loader.set_wanted_items(checked_items)
         if checked_items:
             rows, cols = self.subplot_grid[len(checked_items)-1]
             for index, item in enumerate(checked_items):
                 try:
-                    if update_data:
-                        item.data.prepare_data_for_plot()
+                    # Data that was not loaded before is loaded in the 
+                    # background; a placeholder is shown in the meantime
+                    if update_data and not self.data_loader.is_pending(item):
+                        if hasattr(item.data, 'processed_data'):
+                            item.data.prepare_data_for_plot()
+                        else:
+                            self.data_loader.load(item)
                     item.data.figure = self.figure
                     item.data.axes = item.data.figure.add_subplot(rows, cols, index+1)
+                    if self.data_loader.is_pending(item):
+                        item.data.axes.text(0.5, 0.5, f'Loading {item.data.label}...', 
+                                            ha='center', va='center', 
+                                            transform=item.data.axes.transAxes)
+                        item.data.axes.set_axis_off()
+                        continue
                     item.data.add_plot(dim=len(item.data.get_columns()))
                     if hasattr(item.data, 'linecut_window'):
                         item.data.linecut_window.update()
@@ -414,29 +489,99 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
                     print(f'Could not plot {item.data.filepath}...', e)
                     raise
         self.show_current_all()
+        self.draw_canvas()
+        self.show_remaining_time()
+    
+    def replot_items(self, items):
+        # Show new data of items in their own subplots; the artists of the 
+        # other subplots are kept. Artists are updated in place if possible,
+        # and only the axes of items are drawn again if none of their limits 
+        # and color scales changed.
+        draw_canvas = False
+        start_time = time.perf_counter()
+        for item in items:
+            try:
+                dim = len(item.data.get_columns())
+                if item.data.update_plot(dim):
+                    draw_canvas = (draw_canvas or 
+                                   item.data.get_view() != getattr(item.data, 'drawn_view', None))
+                else:
+                    item.data.remove_plot()
+                    item.data.add_plot(dim)
+                    draw_canvas = True
+                if hasattr(item.data, 'linecut_window'):
+                    item.data.linecut_window.update()
+                if hasattr(item.data, 'multiple_linecuts_window'):
+                    if item.data.multiple_linecuts_window.isVisible():
+                        item.data.multiple_linecuts_window.update()
+            except Exception as e:
+                print(f'Could not plot {item.data.filepath}...', e)
+                draw_canvas = True
+        self.show_current_all()
+        draw_time = time.perf_counter()
+        if draw_canvas:
+            self.draw_canvas()
+        else:
+            for item in items:
+                item.data.draw_plot_data()
+        self.metrics.observe('inspectra_refresh_stage_seconds', draw_time-start_time, stage='plot')
+        self.metrics.observe('inspectra_refresh_stage_seconds', 
+                             time.perf_counter()-draw_time, stage='draw')
+        self.show_remaining_time()
+    
+    def draw_canvas(self):
         self.canvas.draw()
-        if hasattr(self, 'live_track_item') and self.live_track_item:
-            if (self.live_track_item.checkState() and 
-                self.track_button.text() == 'Stop' and 
-                hasattr(self.live_track_item.data, 'remaining_time_string')):
-                self.remaining_time_label.setText(self.live_track_item.data.remaining_time_string)
-            else:
-                self.remaining_time_label.setText('')
+        for item in self.get_checked_items():
+            if hasattr(item.data, 'axes') and hasattr(item.data, 'image'):
+                item.data.drawn_view = item.data.get_view()
+    
+    def show_remaining_time(self):
+        # Progress and remaining time of the tracked files that are shown
+        remaining_times = [(item.data.label, item.data.remaining_time_string) 
+                           for item in self.live_tracker.get_items() if item.checkState() and
+                           getattr(item.data, 'remaining_time_string', '')]
+        if len(remaining_times) == 1:
+            self.remaining_time_label.setText(remaining_times[0][1])
+        else:
+            self.remaining_time_label.setText('\n'.join(f'  {label}: {remaining_time.strip()}' 
+                                                         for label, remaining_time in remaining_times))
           
-    def refresh_files(self):
-        checked_items = self.get_checked_items()
-        if checked_items:
-            for item in checked_items:
+    def data_loaded(self, item):
+        self.paste_duplicated_settings(item)
+        if item.checkState() == 2:
+            self.update_plots(update_data=False)
+        elif item is self.file_list.currentItem():
+            self.show_current_all()
+    
+    def is_loading(self, item):
+        return item is not None and self.data_loader.is_pending(item)
+    
+    def refresh_files(self, items=None):
+        # Only files of items (default: the checked items) that changed since
+        # they were loaded are reloaded
+        if items is None:
+            items = self.get_checked_items()
+        changed_items = [item for item in items
+                         if not self.data_loader.is_pending(item) and 
+                         hasattr(item.data, 'axes') and item.data.file_changed()]
+        if changed_items:
+            start_time = time.perf_counter()
+            for item in changed_items:
+                n_rows = getattr(item.data, 'measured_data_points', 0)
                 item.data.prepare_data_for_plot(reload_data=True)
-            self.update_plots()
-        if self.linked_folder:
-            old_number_of_items = self.file_list.count()
-            self.update_link_to_folder(new_folder=False)
-            if self.file_list.count() > old_number_of_items:
-                last_item = self.file_list.item(self.file_list.count()-1)
-                self.file_double_clicked(last_item)
-                self.file_list.setCurrentItem(last_item)
-                self.track_button_clicked()
+                n_new_rows = getattr(item.data, 'measured_data_points', 0)-n_rows
+                if n_new_rows > 0:
+                    self.metrics.inc('inspectra_rows_ingested_total', n_new_rows, 
+                                     file=item.data.label)
+            self.metrics.observe('inspectra_refresh_stage_seconds', 
+                                 time.perf_counter()-start_time, stage='load')
+            self.replot_items(changed_items)
+            now = time.time()
+            for item in changed_items:
+                modified_time = item.data.get_modified_time()
+                if modified_time is not None:
+                    self.metrics.observe('inspectra_ingest_lag_seconds', 
+                                         max(0, now-modified_time), file=item.data.label)
             
     def to_next_file(self):
         checked_items, indices = self.get_checked_items(return_indices=True)
@@ -475,70 +620,71 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
         
     def track_button_clicked(self):
         current_item = self.file_list.currentItem()
-        if (self.track_button.text() == 'Track' and 
-            current_item and current_item.checkState() and
-            not current_item.data.file_finished()):
-            self.live_track_item = current_item
-            self.live_track_item.setText('[LIVE] '+self.live_track_item.data.label)
-            self.live_track_item.data.prepare_data_for_plot(reload_data=True)
-            if self.live_track_item.data.raw_data:
-                if len(self.live_track_item.data.get_columns()) == 3: # if file is 3D
-                    self.start_auto_refresh(AUTO_REFRESH_INTERVAL_3D)
-                elif len(self.live_track_item.data.get_columns()) == 2: # if file is 2D
-                    self.start_auto_refresh(AUTO_REFRESH_INTERVAL_2D)
-            else:
-                self.start_auto_refresh(AUTO_REFRESH_INTERVAL_2D, 
-                                        wait_for_file=True)
-        elif self.track_button.text() == 'Stop':
-            self.stop_auto_refresh()
-        
-    def start_auto_refresh(self, time_interval, wait_for_file=False):
-        self.track_button.setText('Stop')
-        self.auto_refresh_timer = QtCore.QTimer()
-        self.auto_refresh_timer.setInterval(time_interval*1000)
-        if wait_for_file:
-            self.auto_refresh_timer.timeout.connect(self.wait_for_file_call)
-        else:
-            self.auto_refresh_timer.timeout.connect(self.auto_refresh_call)
-        self.action_refresh_stop.setEnabled(True)
-        self.auto_refresh_timer.start()
-        self.window_title_auto_refresh = ' - Auto-Refreshing Enabled'
-        self.setWindowTitle(self.window_title+self.window_title_auto_refresh)
-        self.auto_refresh_call()
+        if current_item and self.live_tracker.is_tracked(current_item):
+            self.stop_tracking(current_item)
+        elif (current_item and current_item.checkState() and
+              not current_item.data.file_finished()):
+            self.start_tracking(current_item)
         
-    def wait_for_file_call(self):
-        if self.live_track_item and self.live_track_item.checkState():
-            self.live_track_item.data.prepare_data_for_plot(reload_data=True)
-            if self.live_track_item.data.raw_data:
-                self.auto_refresh_timer.stop()
-                self.track_button.setText('Track')
-                self.track_button_clicked()            
+    def start_tracking(self, item):
+        # Several files can be tracked at once; each is refreshed at its own
+        # interval by the live tracker (see refresh_scheduler.py)
+        item.setText('[LIVE] '+item.data.label)
+        self.live_tracker.add(item)
+        self.update_tracking_status()
+        if self.metrics_server is None and metrics.METRICS_PORT:
+            try:
+                self.metrics_server = metrics.MetricsServer(self.metrics)
+            except OSError as e:
+                print(f'Could not serve metrics on port {metrics.METRICS_PORT}...', e)
+    
+    def closeEvent(self, event):
+        if self.metrics_server:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        super().closeEvent(event)
+    
+    def stop_tracking(self, item):
+        self.live_tracker.remove(item)
+        self.metrics.remove_gauges(file=item.data.label)
+        item.setText(item.data.label)
+        self.update_tracking_status()
             
-    def auto_refresh_call(self):
-        if self.live_track_item and self.live_track_item.checkState():
-            if self.live_track_item.data.file_finished():
-                print('Stop auto refresh...')
-                self.live_track_item.data.remaining_time_string = ''
-                self.stop_auto_refresh()
-            else:
-                if hasattr(self.live_track_item.data, 'remaining_time_string'):
-                    self.remaining_time_label.setText(self.live_track_item.data.remaining_time_string)
-                else:
-                    self.remaining_time_label.setText('')
-            self.window_title_auto_refresh = ' - Auto-Refreshing Enabled (Refreshing...)'
-            self.setWindowTitle(self.window_title+self.window_title_auto_refresh)
-            self.refresh_files()
-            self.window_title_auto_refresh = ' - Auto-Refreshing Enabled'
-            self.setWindowTitle(self.window_title+self.window_title_auto_refresh)
+    def refresh_live_items(self, items):
+        # Called by the live tracker with the tracked items that are due
+        for item in items:
+            if item.checkState() and item.data.file_finished():
+                print(f'Stop tracking {item.data.label}...')
+                item.data.remaining_time_string = ''
+                self.stop_tracking(item)
+        self.window_title_auto_refresh = ' - Auto-Refreshing Enabled (Refreshing...)'
+        self.setWindowTitle(self.window_title+self.window_title_auto_refresh)
+        self.refresh_files([item for item in items if self.live_tracker.is_tracked(item) 
+                            and item.checkState()])
+        for tracked_item in self.live_tracker.tracked_items:
+            label = tracked_item.item.data.label
+            self.metrics.set('inspectra_ingest_rate_rows', tracked_item.scheduler.rate or 0, 
+                             file=label)
+            self.metrics.set('inspectra_refresh_interval_seconds', 
+                             tracked_item.scheduler.get_interval(), file=label)
+        self.update_tracking_status()
         
     def stop_auto_refresh(self):
-        self.track_button.setText('Track')
-        self.auto_refresh_timer.stop()
-        self.action_refresh_stop.setEnabled(False)
-        self.window_title_auto_refresh = ''
+        for item in self.live_tracker.get_items():
+            self.stop_tracking(item)
+    
+    def update_tracking_status(self):
+        current_item = self.file_list.currentItem()
+        if current_item and self.live_tracker.is_tracked(current_item):
+            self.track_button.setText('Stop')
+        else:
+            self.track_button.setText('Track')
+        tracking = bool(self.live_tracker.get_items())
+        self.metrics.set('inspectra_tracked_files', len(self.live_tracker.get_items()))
+        self.action_refresh_stop.setEnabled(tracking)
+        self.window_title_auto_refresh = ' - Auto-Refreshing Enabled' if tracking else ''
         self.setWindowTitle(self.window_title+self.window_title_auto_refresh)
-        self.remaining_time_label.setText('')
-        self.live_track_item.setText(self.live_track_item.data.label)
+        self.show_remaining_time()
         
     def move_file(self, direction):
         current_item = self.file_list.currentItem()
@@ -563,13 +709,21 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
                     self.update_plots()
         
     def show_current_all(self):
+        # Plot settings and filters of an item that is loaded in the 
+        # background are changed by the loader, so they can only be edited
+        # once it has been loaded (see data_loaded)
+        loading = self.is_loading(self.file_list.currentItem())
+        self.settings_box.setEnabled(not loading)
+        self.filters_box.setEnabled(not loading)
         self.show_current_plot_settings()
         self.show_current_view_settings()
         self.show_current_filters()
     
     def show_current_plot_settings(self):
         current_item = self.file_list.currentItem()
-        if current_item:
+        if self.is_loading(current_item):
+            self.settings_table.setRowCount(0)
+        elif current_item:
             self.settings_table.itemChanged.disconnect(self.plot_setting_edited)
             self.settings_table.setRowCount(0)
             settings = current_item.data.settings
@@ -618,13 +772,13 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
     def show_current_filters(self):
         self.filters_table.setRowCount(0)
         current_item = self.file_list.currentItem()
-        if current_item:
+        if current_item and not self.is_loading(current_item):
             for _ in current_item.data.filters:
                 self.append_filter_to_table()
     
     def plot_setting_edited(self):
         current_item = self.file_list.currentItem()
-        if current_item:
+        if current_item and not self.is_loading(current_item):
             current_item.data.old_settings = current_item.data.settings.copy()
             row = self.settings_table.currentRow()
             setting_name = self.settings_table.item(row, 0).text()
@@ -632,7 +786,8 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
             current_item.data.settings[setting_name] = value
             self.settings_table.clearFocus()
             try:
-                if setting_name == 'columns' or setting_name == 'delimiter':
+                if (setting_name == 'columns' or setting_name == 'delimiter' or
+                    setting_name == 'regrid' or setting_name == 'window'):
                     current_item.data.prepare_data_for_plot(reload_data=True)
                     self.update_plots()           
                 elif setting_name == 'linecolor':
@@ -655,6 +810,8 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
     
     def view_setting_edited(self, edited_setting):
         current_item = self.file_list.currentItem()
+        if self.is_loading(current_item):
+            return
         view_settings = current_item.data.view_settings
         current_item.data.old_view_settings = view_settings.copy()
         if current_item:
@@ -707,7 +864,7 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
         
     def colormap_edited(self):
         current_item = self.file_list.currentItem()
-        if current_item:
+        if current_item and not self.is_loading(current_item):
             settings = current_item.data.view_settings
             settings['Colormap Type'] = self.colormap_type_box.currentText()
             settings['Colormap'] = self.colormap_box.currentText()
@@ -718,6 +875,8 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
     
     def filters_table_edited(self, item):
         current_item = self.file_list.currentItem()
+        if self.is_loading(current_item):
+            return
         current_item.data.old_filters = copy.deepcopy(current_item.data.filters)
         if current_item:   
             try:
@@ -729,8 +888,7 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
                                  self.filters_table.item(row, 3).text()]
                 filt.checkstate = filter_item.checkState()
                 self.filters_table.clearFocus()
-                current_item.data.apply_all_filters()
-                current_item.data.reset_view_settings()
+                self.refilter(current_item)
                 if current_item.checkState():
                     self.update_plots()
                     self.show_current_filters()
@@ -756,7 +914,7 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
     
     def paste_plot_settings(self, which='copied'):
         current_item = self.file_list.currentItem()
-        if current_item:
+        if current_item and not self.is_loading(current_item):
             if which == 'copied':
                 if self.copied_settings:
                     current_item.data.settings = self.copied_settings.copy()
@@ -771,14 +929,14 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
     
     def paste_filters(self, which='copied'):
         current_item = self.file_list.currentItem()
-        if current_item:
+        if current_item and not self.is_loading(current_item):
             if which == 'copied':
                 if self.copied_filters:
                     current_item.data.filters = copy.deepcopy(self.copied_filters)
             elif which == 'old':
                 current_item.data.filters = copy.deepcopy(current_item.data.old_filters)
             self.show_current_filters()
-            current_item.data.apply_all_filters()
+            self.refilter(current_item)
             self.show_current_view_settings()
             if current_item.checkState():
                 self.update_plots()
@@ -786,7 +944,7 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
 
     def paste_view_settings(self, which='copied'):
         current_item = self.file_list.currentItem()
-        if current_item:
+        if current_item and not self.is_loading(current_item):
             if which == 'copied':
                 if self.copied_view_settings:
                     current_item.data.view_settings = self.copied_view_settings.copy()
@@ -831,15 +989,29 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
                     
     def duplicate_item(self):
         original_item = self.file_list.currentItem()
-        if original_item:
+        if original_item and not self.is_loading(original_item):
             self.open_files(filepaths=[original_item.data.filepath])
             new_item = self.file_list.currentItem()
             new_item.setText(f'[DUPLICATE] {new_item.data.label}')
             new_item.duplicate = True
-            new_item.data.settings = original_item.data.settings.copy()
-            new_item.data.view_settings = original_item.data.view_settings.copy()
-            new_item.data.filters = copy.deepcopy(original_item.data.filters)              
-            self.update_plots()
+            new_item.duplicated_settings = (original_item.data.settings.copy(),
+                                            original_item.data.view_settings.copy(),
+                                            copy.deepcopy(original_item.data.filters))
+            if self.paste_duplicated_settings(new_item):
+                self.update_plots()
+    
+    def paste_duplicated_settings(self, item):
+        # The first load of data sets default settings and filters, so those 
+        # of the original item are only pasted once the duplicate has been 
+        # loaded (see data_loaded)
+        if (hasattr(item, 'duplicated_settings') and not self.is_loading(item) and
+            hasattr(item.data, 'raw_data')):
+            item.data.settings, item.data.view_settings, item.data.filters = item.duplicated_settings
+            del item.duplicated_settings
+            item.data.invalidate('raw')
+            item.data.prepare_data_for_plot()
+            return True
+        return False
                 
     def combine_plots(self):
         checked_items = self.get_checked_items()
@@ -883,7 +1055,7 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
 
     def reset_color_limits(self):
         current_item = self.file_list.currentItem()
-        if current_item:
+        if current_item and not self.is_loading(current_item):
             current_item.data.reset_view_settings(overrule=True)
             self.show_current_view_settings()
             if current_item.checkState():
@@ -892,9 +1064,10 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
     
     def filters_box_changed(self):
         current_item = self.file_list.currentItem()
-        if current_item:
+        if current_item and not self.is_loading(current_item):
             filt = Filter(self.filters_combobox.currentText())
             current_item.data.filters.append(filt)
+            current_item.data.invalidate('filters')
             if current_item.checkState() and filt.checkstate:
                 self.update_plots()
             else:
@@ -937,27 +1110,32 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
     
     def remove_filters(self, which='current'):
         current_item = self.file_list.currentItem()
-        if current_item:
+        if current_item and not self.is_loading(current_item):
             if which == 'current':
                 filter_row = self.filters_table.currentRow()
                 if filter_row != -1:
                     self.filters_table.removeRow(filter_row)
                     del current_item.data.filters[filter_row]
-                    current_item.data.apply_all_filters()
-                    current_item.data.reset_view_settings()
+                    self.refilter(current_item)
             elif which == 'all':
                 self.filters_table.setRowCount(0)
                 current_item.data.filters = []
-                current_item.data.apply_all_filters()
-                current_item.data.reset_view_settings()
+                self.refilter(current_item)
             if current_item.checkState():
                 current_item.data.apply_view_settings()
                 self.update_plots()
                 self.show_current_view_settings()
      
+    def refilter(self, item):
+        # The filters are applied again to the unfiltered data; the data of 
+        # items that were not loaded yet is filtered when it is first shown
+        item.data.invalidate('filters')
+        if getattr(item.data, 'raw_data', None):
+            item.data.prepare_data_for_plot()
+    
     def move_filter(self, to):
         current_item = self.file_list.currentItem()
-        if current_item:
+        if current_item and not self.is_loading(current_item):
             filters = current_item.data.filters
             row = self.filters_table.currentRow()
             if ((row > 0 and to == -1) or
@@ -967,7 +1145,7 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
                 self.filters_table.setCurrentCell(row+to, 0)
                 if (self.filters_table.item(row,0).checkState() and 
                     self.filters_table.item(row+to,0).checkState()):
-                    current_item.data.apply_all_filters()
+                    self.refilter(current_item)
                     self.update_plots()
                     self.show_current_view_settings()
 
@@ -1004,12 +1182,12 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
             
     def load_filters(self):
         current_item = self.file_list.currentItem()
-        if current_item:
+        if current_item and not self.is_loading(current_item):
             filename, _ = QtWidgets.QFileDialog.getOpenFileNames(
                     self, 'Open Filters File...', '', '*.npy')
             loaded_filters = list(np.load(filename[0], allow_pickle=True))
             current_item.data.filters += copy.deepcopy(loaded_filters)
-            current_item.data.apply_all_filters()
+            self.refilter(current_item)
             self.update_plots()
             self.show_current_view_settings()
     
@@ -1087,6 +1265,11 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
                                             bbox_inches='tight')
                         item.data.raw_data = None
                         item.data.processed_data = None
+                        item.data.invalidate('raw')
+                        if hasattr(item.data, 'tail_reader'):
+                            del item.data.tail_reader
+                        if hasattr(item.data, 'reshaper'):
+                            del item.data.reshaper
                     except Exception as e:
                         print(f'Could not plot {item.data.filepath}...', e)
             if DARK_THEME and qdarkstyle_imported:
@@ -1095,33 +1278,66 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
         
     def update_link_to_folder(self, new_folder=True):
         if new_folder:
-            self.linked_folder = QtWidgets.QFileDialog.getExistingDirectory(self, "Select Directory")
+            folder = QtWidgets.QFileDialog.getExistingDirectory(self, "Select Directory")
+            if not folder:
+                return
+            self.unlink_folder()
+            self.linked_folder = folder
         if self.linked_folder:
             self.window_title = f'Inspectra Gadget - Linked to folder {self.linked_folder}'
             self.setWindowTitle(self.window_title+self.window_title_auto_refresh)
-            new_files = []
-            for subdir, dirs, files in os.walk(self.linked_folder):
-                for file in files:
-                    filename, file_extension = os.path.splitext(file)
-                    if file_extension == '.dat':
-                        filepath = os.path.join(subdir, file)
-                        if filepath not in self.linked_files:
-                            try: # on Windows
-                                st_ctime = os.path.getctime(filepath)
-                            except Exception:
-                                try: # on Mac
-                                    st_ctime = os.stat(filepath).st_birthtime
-                                except Exception as e:
-                                    print(e)
-                            new_files.append((st_ctime,filepath))
-            if new_files:
-                new_files.sort(key=lambda tup: tup[0])
-                new_filepaths = [new_file[1] for new_file in new_files]
-                self.open_files(new_filepaths)
-                for new_filepath in new_filepaths:
-                    self.linked_files.append(new_filepath)               
+            if self.folder_index is None:
+                self.folder_index = folder_index.FolderIndex()
+            entries = self.folder_index.update(self.linked_folder)
+            if self.folder_watcher is None:
+                self.folder_watcher = folder_watcher.FolderWatcher(
+                    self.linked_folder, folders=list(self.folder_index.get_folders(self.linked_folder)))
+                self.folder_watcher.files_added.connect(self.linked_files_added)
+                self.folder_watcher.files_modified.connect(self.linked_files_modified)
+                # Files added while the watcher was started
+                entries = self.folder_index.update(self.linked_folder)
+            self.add_linked_files(entries)
+    
+    def add_linked_files(self, entries):
+        # Entries of the folder index are opened without reading the files
+        new_entries = [entry for entry in entries if entry.path not in self.linked_files]
+        if new_entries:
+            new_entries.sort(key=lambda entry: entry.ctime)
+            self.file_list.itemChanged.disconnect(self.file_checked)
+            for entry in new_entries:
+                try:
+                    print(f'Open {entry.path}...')
+                    item = DataItem(create_data(entry.path, self.canvas, entry.meta))
+                    self.file_list.addItem(item)
+                except Exception as e:
+                    print(f'Failed to open {entry.path}...', e)
+            self.check_last_item()
+            self.file_list.itemChanged.connect(self.file_checked)
+            self.linked_files.update(entry.path for entry in new_entries)
+        return new_entries
+    
+    def linked_files_added(self, filepaths):
+        # New files in the linked folder are shown (see check_last_item), and 
+        # tracked if they are still being measured
+        if (self.linked_folder and 
+            self.add_linked_files(self.folder_index.update_files(filepaths))):
+            last_item = self.file_list.item(self.file_list.count()-1)
+            if not self.live_tracker.is_tracked(last_item) and not last_item.data.file_finished():
+                self.start_tracking(last_item)
+                    
+    def linked_files_modified(self, filepaths):
+        # Shown files that changed are refreshed; tracked files are refreshed
+        # at the interval of the live tracker instead
+        filepaths = set(filepaths)
+        items = [item for item in self.get_checked_items() 
+                 if item.data.filepath in filepaths and not self.live_tracker.is_tracked(item)]
+        if items:
+            self.refresh_files(items)
                     
     def unlink_folder(self):
+        if self.folder_watcher is not None:
+            self.folder_watcher.stop()
+            self.folder_watcher = None
         if self.linked_folder:
             self.linked_folder = None
             self.window_title = 'Inspectra Gadget'
@@ -1368,7 +1584,7 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
             self.copy_canvas_to_clipboard()
         elif event.key() == QtCore.Qt.Key_T and event.modifiers() == QtCore.Qt.ControlModifier:
             if not self.action_refresh_stop.isEnabled():
-                self.start_auto_refresh(1)
+                self.track_button_clicked()
                 print('Start live tracking...')
             else:
                 self.stop_auto_refresh()
@@ -1388,6 +1604,16 @@ class Editor(QtWidgets.QMainWindow, design.Ui_MainWindow):
                         item.data.show_settings = preset_item[1]
             self.update_plots()
 
+def create_data(filepath, canvas=None, meta=None):
+    # Data of a Matlab qd file or a bare column-based data file. The text of 
+    # the meta file of qd data can be given (e.g. from the folder index).
+    metapath = os.path.dirname(filepath)+'/meta.json'
+    if meta is not None:
+        return qd_extension.QdData(filepath, canvas, metapath, meta)
+    if os.path.basename(filepath) == 'data.dat' and os.path.isfile(metapath):
+        return qd_extension.QdData(filepath, canvas, metapath)
+    return BaseClassData(filepath, canvas)
+
 class DataItem(QtWidgets.QListWidgetItem):
     def __init__(self, data):
         super().__init__()
@@ -1420,6 +1646,8 @@ class BaseClassData:
     DEFAULT_PLOT_SETTINGS['dpi'] = '300'
     DEFAULT_PLOT_SETTINGS['transparent'] = 'False'
     DEFAULT_PLOT_SETTINGS['shading'] = 'auto'
+    DEFAULT_PLOT_SETTINGS['regrid'] = 'auto'
+    DEFAULT_PLOT_SETTINGS['window'] = '0' # number of last rows shown of 2-column data; 0 for all
     
     # Set default view settings
     DEFAULT_VIEW_SETTINGS = {}
@@ -1432,6 +1660,11 @@ class BaseClassData:
     DEFAULT_VIEW_SETTINGS['MidLock'] = False
     DEFAULT_VIEW_SETTINGS['Reverse'] = False  
     
+    # Stages of prepare_data_for_plot, in order: loading and reshaping the 
+    # raw data, and processing and filtering it (which also sets the color
+    # limits)
+    STAGES = ['raw', 'filters']
+    
     def __init__(self, filepath, canvas):
         self.filepath = filepath
         self.canvas = canvas
@@ -1440,6 +1673,7 @@ class BaseClassData:
         self.settings = self.DEFAULT_PLOT_SETTINGS.copy()
         self.view_settings = self.DEFAULT_VIEW_SETTINGS.copy()
         self.filters = []
+        self.invalid_stages = set(self.STAGES)
 
         try: # on Windows
             self.creation_time = os.path.getctime(filepath)
@@ -1450,82 +1684,110 @@ class BaseClassData:
                 self.creation_time = None
         
     def get_column_data(self):
-        column_data = np.genfromtxt(self.filepath, delimiter=self.settings['delimiter'])
-        self.measured_data_points = column_data.shape[0]
+        # Only the lines that were appended since the previous call are parsed,
+        # and only for the required columns; other columns are parsed on access.
+        # With a window, only the last rows of 2-column data are kept.
+        window = int(self.settings['window'])
+        if (not hasattr(self, 'tail_reader') or 
+            self.tail_reader.delimiter != self.settings['delimiter'] or
+            self.tail_reader.window != window):
+            self.tail_reader = data_reader.TailReader(self.filepath, 
+                                                      self.settings['delimiter'],
+                                                      window=window)
+        column_data = self.tail_reader.read(usecols=self.get_required_columns(),
+                                            finished=self.file_finished())
+        self.measured_data_points = (column_data.n_rows if column_data.window 
+                                     else column_data.shape[0])
         return column_data
     
     def get_columns(self):
         return [int(col) for col in self.settings['columns'].split(',')]
     
+    def get_required_columns(self):
+        # Columns that are parsed on every reload; other columns are parsed 
+        # when first accessed. Columns 1 and columns[1]+1 are used to 
+        # determine the shape of the data in load_and_reshape_data.
+        columns = self.get_columns()
+        return columns + [1, columns[1]+1]
+    
+    def get_file_signature(self):
+        # Size, modification time, inode and last bytes of the file
+        try:
+            with open(self.filepath, 'rb') as f:
+                file_stat = os.fstat(f.fileno())
+                f.seek(max(0, file_stat.st_size-FINGERPRINT_SIZE))
+                return (file_stat.st_size, file_stat.st_mtime_ns, 
+                        file_stat.st_ino, f.read(FINGERPRINT_SIZE))
+        except OSError:
+            return None
+    
+    def get_modified_time(self):
+        # Time at which the file was last modified before the data was loaded
+        file_signature = getattr(self, 'file_signature', None)
+        return file_signature[1]/1e9 if file_signature else None
+    
+    def file_changed(self):
+        # Whether the file changed since the data was last loaded
+        file_signature = self.get_file_signature()
+        return (file_signature is None or 
+                file_signature != getattr(self, 'file_signature', None))
+    
     def load_and_reshape_data(self):
+        self.file_signature = self.get_file_signature()
+        self.data_version = next(filter_chain.data_versions)
         column_data = self.get_column_data()
-        if column_data.ndim == 1: # if empty array or single-row array
+        if column_data.shape[0] < 2 or column_data.shape[1] < 2: # if empty array or single-row array
             self.raw_data = None
+        elif column_data.window:
+            # The rows in the window shift on every refresh, so there is 
+            # nothing to keep between refreshes
+            self.raw_data = data_reader.RawData(column_data, lambda data, index: data)
+            self.settings['columns'] = '0,1'
         else:
-            # Determine the number of unique values in the first column to determine the shape of the data
+            # The reshaper keeps the shape of the data between refreshes, so 
+            # that only new sweeps are processed
             columns = self.get_columns()
-            unique_values, unique_indices = np.unique(column_data[:,columns[0]], 
-                                                      return_index=True)
-            if len(unique_values) > 1:
-                sorted_indices = sorted(unique_indices)
-                if len(column_data[sorted_indices[-1]::,0]) < sorted_indices[1]:
-                    data_shape = (len(unique_values)-1, sorted_indices[1])
-                else:
-                    data_shape = (len(unique_values), sorted_indices[1])
-            else:
-                data_shape = (1, column_data.shape[0])
-
-            if data_shape[0] > 1: # If two or more sweeps are finished
-        
-                # Check if second column also has unique values at the same 
-                # indices as the first column and if the first two values in 
-                # the second column repeat ; if both True, skip that column.
-                # Relevant for measurements where two parameters are swept simultaneously
-                _, next_unique_indices = np.unique(column_data[:,columns[1]], 
-                                                   return_index=True)
-                if ((np.array_equal(unique_indices, next_unique_indices) or
-                     np.array_equal(unique_indices, next_unique_indices[::-1])) and
-                    (column_data[1,columns[1]] == column_data[0,columns[1]])):
-                    columns[1] += 1
-                    if len(columns) > 2 and columns[1] == columns[2]:
-                        columns[2] += 1
-                
-                # Determine if file is 2D or 3D by checking if first two values in first column are repeated
-                if column_data[1,columns[0]] != column_data[0,columns[0]] or len(columns) == 2:
-                    self.raw_data = [column_data[:,x] for x in range(column_data.shape[1])]            
-                    columns = columns[:2]
-                else: 
-                    # flip if first column is sorted from high to low 
-                    if unique_values[1] < unique_values[0]: 
-                        column_data = np.flipud(column_data)
-                    self.raw_data = [np.reshape(column_data[:data_shape[0]*data_shape[1],x], data_shape) 
-                                     for x in range(column_data.shape[1])]
-                    # flip if second column is sorted from high to low
-                    if self.raw_data[1][0,0] > self.raw_data[1][0,1]: 
-                        self.raw_data = [np.fliplr(self.raw_data[x]) for x in range(column_data.shape[1])]
-                        
-            elif data_shape[0] == 1: # if first two sweeps are not finished -> duplicate data of first sweep to enable 3D plotting
-                self.raw_data = [np.tile(column_data[:data_shape[1],x], (2,1)) for x in range(column_data.shape[1])]    
-                if len(unique_values) > 1: # if first sweep is finished -> set second x-column to second x-value
-                    self.raw_data[columns[0]][0,:] = unique_values[0]
-                    self.raw_data[columns[0]][1,:] = unique_values[1]
-                else: # if first sweep is not finished -> set duplicate x-columns to +1 and -1 of actual value
-                    self.raw_data[columns[0]][0,:] = unique_values[0]-1
-                    self.raw_data[columns[0]][1,:] = unique_values[0]+1
-            self.settings['columns'] = ','.join([str(i) for i in columns])
+            if (not hasattr(self, 'reshaper') or 
+                not self.reshaper.is_valid(column_data, columns, self.settings['regrid'])):
+                self.reshaper = data_reader.GridReshaper(columns, self.settings['regrid'])
+            self.raw_data = self.reshaper.reshape(column_data, columns)
+            self.settings['columns'] = ','.join([str(i) for i in self.reshaper.columns])
                    
     def copy_raw_to_processed_data(self):
-        self.processed_data = [np.copy(self.raw_data[x]) for x in self.get_columns()]
+        # Read-only views of the raw data; these are only copied when a filter
+        # modifies data in place (see apply_filter_function)
+        self.processed_data = [data_reader.read_only_view(self.raw_data[x]) 
+                               for x in self.get_columns()]
 
+    def invalidate(self, stage):
+        # The stage and the stages after it are done again on the next call 
+        # of prepare_data_for_plot
+        self.invalid_stages.update(self.STAGES[self.STAGES.index(stage):])
+    
     def prepare_data_for_plot(self, reload_data=False, refresh_filters=False):
-        if not hasattr(self, 'raw_data') or reload_data:
+        # Only stages that were invalidated are done again
+        if reload_data:
+            self.invalidate('raw')
+        if not hasattr(self, 'raw_data') or 'raw' in self.invalid_stages:
             self.load_and_reshape_data()
         if self.raw_data:
-            self.copy_raw_to_processed_data()
-            self.apply_all_filters()
+            if 'filters' in self.invalid_stages or not getattr(self, 'processed_data', None):
+                self.copy_raw_to_processed_data()
+                self.apply_all_filters()
         else:
             self.processed_data = None
+        self.invalid_stages.clear()
 
+    def remove_plot(self):
+        # Remove the artists of a previous add_plot from the axes
+        if hasattr(self, 'cbar'):
+            if self.cbar.ax in self.figure.axes:
+                self.cbar.remove()
+            del self.cbar
+        if hasattr(self, 'cursor'):
+            self.cursor.disconnect_events()
+        self.axes.clear()
+    
     def add_plot(self, dim):
         if self.processed_data:
             cmap_str = self.view_settings['Colormap']
@@ -1546,16 +1808,73 @@ class BaseClassData:
                                                   shading=self.settings['shading'], 
                                                   norm=norm, cmap=cmap,
                                                   rasterized=self.settings['rasterized'])
+                self.mesh_coordinates = (np.array(self.processed_data[0]), 
+                                         np.array(self.processed_data[1]))
                 if self.settings['colorbar'] == 'True':
                     self.cbar = self.figure.colorbar(self.image, orientation='vertical')
             self.cursor = Cursor(self.axes, useblit=True, 
                                  color=self.settings['linecolor'], linewidth=0.5)
             self.apply_plot_settings()
 
+    def update_plot(self, dim):
+        # Show new data in the artists of add_plot. The mesh of a 3D plot is 
+        # only made again if its grid changed, e.g. when a new sweep arrived.
+        # Returns False if the plot has to be made again with add_plot.
+        if not self.processed_data or not hasattr(self, 'image'):
+            return False
+        if dim == 2 and isinstance(self.image, list):
+            self.image[0].set_data(self.processed_data[0], self.processed_data[1])
+            self.axes.relim()
+            self.axes.autoscale_view()
+            return True
+        if dim == 3 and isinstance(self.image, QuadMesh):
+            x, y, z = self.processed_data
+            if (z.shape == self.image.get_array().shape and 
+                np.array_equal(x, self.mesh_coordinates[0], equal_nan=True) and 
+                np.array_equal(y, self.mesh_coordinates[1], equal_nan=True)):
+                self.image.set_array(z)
+            else:
+                image = self.image
+                self.image = self.axes.pcolormesh(x, y, z, shading=self.settings['shading'], 
+                                                  norm=image.norm, cmap=image.cmap,
+                                                  rasterized=self.settings['rasterized'])
+                image.remove()
+                self.mesh_coordinates = (np.array(x), np.array(y))
+                if hasattr(self, 'cbar'):
+                    self.cbar.update_normal(self.image)
+            return True
+        return False
+    
+    def get_view(self):
+        # If the limits and the color scale of the plot do not change, only 
+        # the data in the axes has to be drawn again
+        view = (self.axes.get_xlim(), self.axes.get_ylim())
+        if len(self.get_columns()) == 3:
+            view += (self.view_settings['Minimum'], self.view_settings['Maximum'], 
+                     self.view_settings['Midpoint'])
+        return view
+    
+    def draw_plot_data(self):
+        # Draw the axes, without its labels and ticks, over the last drawn 
+        # canvas
+        for artist in [self.axes.patch, *self.axes.collections, *self.axes.lines, 
+                       *self.axes.spines.values()]:
+            self.axes.draw_artist(artist)
+        self.canvas.blit(self.axes.bbox)
+        if hasattr(self, 'cursor'):
+            self.cursor.clear(None)
+        
     def reset_view_settings(self, overrule=False):
         if not self.view_settings['Locked'] or overrule:
-            minimum = np.min(self.processed_data[-1])
-            maximum = np.max(self.processed_data[-1])
+            # Read-only values (results of the filter chain) are not rescanned
+            # if they are the same as before, e.g. when only the axes changed
+            values = self.processed_data[-1]
+            limits = getattr(self, 'color_limits', None)
+            if limits and limits[0]() is values and not values.flags.writeable:
+                _, minimum, maximum = limits
+            else:
+                minimum, maximum = np.nanmin(values), np.nanmax(values)
+                self.color_limits = (weakref.ref(values), minimum, maximum)
             self.view_settings['Minimum'] = minimum
             self.view_settings['Maximum'] = maximum
             self.view_settings['Midpoint'] = 0.5*(minimum+maximum)
@@ -1631,23 +1950,37 @@ class BaseClassData:
         else:
             self.image[0].set_color(cmap(0.5))            
 
+    def apply_filter_function(self, filt, data=None):
+        # Applies filt to data (default: the processed data)
+        if data is None:
+            data = self.processed_data
+        if Filter.DEFAULT_SETTINGS[filt.name]['In Place']:
+            data = [array if array.flags.writeable else array.copy()
+                    for array in data]
+        return filt.function(data, filt.method, filt.settings[0], filt.settings[1])
+
     def apply_filter(self, filt, update_color_limits=True):
         if filt.checkstate:
-            self.processed_data = filt.function(self.processed_data, 
-                                                filt.method,
-                                                filt.settings[0], 
-                                                filt.settings[1]) 
+            self.processed_data = self.apply_filter_function(filt)
             if update_color_limits:
                 self.reset_view_settings()
                 self.apply_view_settings()
                 
-    def apply_all_filters(self, update_color_limits=True):        
-        for filt in self.filters:
-            if filt.checkstate:
-                self.processed_data = filt.function(self.processed_data, 
-                                                    filt.method,
-                                                    filt.settings[0], 
-                                                    filt.settings[1])
+    def get_filter_input_key(self):
+        # Identifies the processed data before filtering; it only changes when
+        # data is loaded or other columns are shown
+        return (getattr(self, 'data_version', None), self.settings['columns'])
+    
+    def apply_all_filters(self, update_color_limits=True):
+        # The filters are applied to the processed data as it was before 
+        # filtering, which is kept along with the results of the first filters
+        # (see filter_chain.py), so that only filters from the first changed 
+        # one onwards are applied again
+        if not hasattr(self, 'filter_chain'):
+            self.filter_chain = filter_chain.FilterChain()
+        self.processed_data = self.filter_chain.apply(self.get_filter_input_key(), 
+                                                      self.processed_data, self.filters,
+                                                      self.apply_filter_function)
         if update_color_limits:
             self.reset_view_settings()
             if hasattr(self, 'image'):
@@ -1700,99 +2033,218 @@ class NumpyData(BaseClassData):
         self.raw_data = self.dataset['Raw Data']
 
     def prepare_data_for_plot(self, reload_data=False):
-        self.copy_raw_to_processed_data()
-        self.apply_all_filters()
+        if 'filters' in self.invalid_stages or not hasattr(self, 'processed_data'):
+            self.copy_raw_to_processed_data()
+            self.apply_all_filters()
+        self.invalid_stages.clear()
+        
+    def file_changed(self):
+        return False
 
 
 class Filter:   
+    # 'Changes': the arrays a filter changes: 'Axes', 'Values' (the last 
+    # array), 'All' or 'Method' (the array named by the method: X, Y or Z).
+    # 'Uses Axes': whether the values it computes depend on the axes.
+    # These are used to skip work when only the axes change (see filter_chain.py)
     DEFAULT_SETTINGS = {'Derivative': {'Method': ['Mid'],
                                        'Settings': ['0', '1'],
                                        'Function': filters.derivative,
-                                       'Checkstate': 2},
+                                       'Checkstate': 2,
+                                       'In Place': False,
+                                       'Changes': 'Values',
+                                       'Uses Axes': True,
+                                       'Element-wise': False,
+                                       'Shape Preserving': True},
                         'Smoothen': {'Method': ['Gauss', 'Median'],
                                      'Settings': ['0', '2'],
                                      'Function': filters.smooth,
-                                     'Checkstate': 2},
+                                     'Checkstate': 2,
+                                     'In Place': False,
+                                     'Changes': 'Values',
+                                     'Uses Axes': False,
+                                     'Element-wise': False,
+                                     'Shape Preserving': True},
                         'Sav-Gol': {'Method': ['Y','X','dY','dX','ddY','ddX'],
                                     'Settings': ['7', '2'],
                                     'Function': filters.sav_gol,
-                                    'Checkstate': 2},                               
+                                    'Checkstate': 2,
+                                    'In Place': False,
+                                    'Changes': 'Values',
+                                    'Uses Axes': True,
+                                    'Element-wise': False,
+                                    'Shape Preserving': True},                               
                         'Crop X': {'Method': ['Abs', 'Rel', 'Lim'],
                                    'Settings': ['-1', '1'],
                                    'Function': filters.crop_x,
-                                   'Checkstate': 0},                              
+                                   'Checkstate': 0,
+                                   'In Place': False,
+                                   'Changes': 'All',
+                                   'Uses Axes': True,
+                                   'Element-wise': False,
+                                   'Shape Preserving': False},                              
                         'Crop Y': {'Method': ['Abs', 'Rel', 'Lim'],
                                    'Settings': ['-2', '2'],
                                    'Function': filters.crop_y,
-                                   'Checkstate': 0},
+                                   'Checkstate': 0,
+                                   'In Place': False,
+                                   'Changes': 'All',
+                                   'Uses Axes': True,
+                                   'Element-wise': False,
+                                   'Shape Preserving': False},
                         'Logarithm': {'Method': ['Mask','Shift','Abs'],
                                       'Settings': ['', ''],
                                       'Function': filters.logarithm,
-                                      'Checkstate': 2}, 
+                                      'Checkstate': 2,
+                                      'In Place': False,
+                                      'Changes': 'Values',
+                                      'Uses Axes': False,
+                                      'Element-wise': False,
+                                      'Shape Preserving': True}, 
                         'Root': {'Method': [''],
                                  'Settings': ['2', ''],
                                  'Function': filters.root,
-                                 'Checkstate': 2}, 
+                                 'Checkstate': 2,
+                                 'In Place': False,
+                                 'Changes': 'Values',
+                                 'Uses Axes': False,
+                                 'Element-wise': True,
+                                 'Shape Preserving': True}, 
                         'Offset': {'Method': ['X','Y','Z'],
                                    'Settings': ['0', ''],
                                    'Function': filters.offset,
-                                   'Checkstate': 0},               
+                                   'Checkstate': 0,
+                                   'In Place': True,
+                                   'Changes': 'Method',
+                                   'Uses Axes': False,
+                                   'Element-wise': True,
+                                   'Shape Preserving': True},               
                         'Absolute': {'Method': [''],
                                      'Settings': ['', ''],
                                      'Function': filters.absolute,
-                                     'Checkstate': 2}, 
+                                     'Checkstate': 2,
+                                     'In Place': False,
+                                     'Changes': 'Values',
+                                     'Uses Axes': False,
+                                     'Element-wise': True,
+                                     'Shape Preserving': True}, 
                         'Multiply': {'Method': ['X','Y','Z'],
                                      'Settings': ['1', ''],
                                      'Function': filters.multiply,
-                                     'Checkstate': 2}, 
+                                     'Checkstate': 2,
+                                     'In Place': True,
+                                     'Changes': 'Method',
+                                     'Uses Axes': False,
+                                     'Element-wise': True,
+                                     'Shape Preserving': True}, 
                         'Divide': {'Method': ['X','Y','Z'],
                                    'Settings': ['1', ''],
                                    'Function': filters.divide,
-                                   'Checkstate': 0}, 
+                                   'Checkstate': 0,
+                                   'In Place': True,
+                                   'Changes': 'Method',
+                                   'Uses Axes': False,
+                                   'Element-wise': True,
+                                   'Shape Preserving': True}, 
                         'Roll X': {'Method': ['Index'],
                                    'Settings': ['0', '0'],
                                    'Function': filters.roll_x,
-                                   'Checkstate': 0},                             
+                                   'Checkstate': 0,
+                                   'In Place': True,
+                                   'Changes': 'Values',
+                                   'Uses Axes': False,
+                                   'Element-wise': False,
+                                   'Shape Preserving': True},                             
                         'Roll Y': {'Method': ['Index'],
                                    'Settings': ['0', '0'],
                                    'Function': filters.roll_y,
-                                   'Checkstate': 0}, 
+                                   'Checkstate': 0,
+                                   'In Place': True,
+                                   'Changes': 'Values',
+                                   'Uses Axes': False,
+                                   'Element-wise': False,
+                                   'Shape Preserving': True}, 
                         'Cut X': {'Method': ['Index'],
                                   'Settings': ['0', '0'],
                                   'Function': filters.cut_x,
-                                  'Checkstate': 0},                               
+                                  'Checkstate': 0,
+                                  'In Place': False,
+                                  'Changes': 'Values',
+                                  'Uses Axes': False,
+                                  'Element-wise': False,
+                                  'Shape Preserving': True},                               
                         'Cut Y': {'Method': ['Index'],
                                   'Settings': ['0', '0'],
                                   'Function': filters.cut_y,
-                                  'Checkstate': 0},                                
+                                  'Checkstate': 0,
+                                  'In Place': False,
+                                  'Changes': 'Values',
+                                  'Uses Axes': False,
+                                  'Element-wise': False,
+                                  'Shape Preserving': True},                                
                         'Swap XY': {'Method': [''],
                                     'Settings': ['', ''],
                                     'Function': filters.swap_xy,
-                                    'Checkstate': 2}, 
+                                    'Checkstate': 2,
+                                    'In Place': False,
+                                    'Changes': 'Axes',
+                                    'Uses Axes': False,
+                                    'Element-wise': False,
+                                    'Shape Preserving': True}, 
                         'Flip': {'Method': ['L-R','U-D'],
                                  'Settings': ['', ''],
                                  'Function': filters.flip,
-                                 'Checkstate': 2}, 
+                                 'Checkstate': 2,
+                                 'In Place': False,
+                                 'Changes': 'Values',
+                                 'Uses Axes': False,
+                                 'Element-wise': False,
+                                 'Shape Preserving': True}, 
                         'Normalize': {'Method': ['Max', 'Min', 'Point'],
                                       'Settings': ['', ''],
                                       'Function': filters.normalize,
-                                      'Checkstate': 0},                
+                                      'Checkstate': 0,
+                                      'In Place': False,
+                                      'Changes': 'Values',
+                                      'Uses Axes': True,
+                                      'Element-wise': False,
+                                      'Shape Preserving': True},                
                         'Slope': {'Method': [''],
                                   'Settings': ['0', '-1'],
                                   'Function': filters.add_slope,
-                                  'Checkstate': 0}, 
+                                  'Checkstate': 0,
+                                  'In Place': True,
+                                  'Changes': 'Values',
+                                  'Uses Axes': True,
+                                  'Element-wise': True,
+                                  'Shape Preserving': True}, 
                         'Interp': {'Method': ['linear','cubic','quintic'],
                                    'Settings': ['800', '600'],
                                    'Function': filters.interpolate,
-                                   'Checkstate': 0},
+                                   'Checkstate': 0,
+                                   'In Place': False,
+                                   'Changes': 'All',
+                                   'Uses Axes': True,
+                                   'Element-wise': False,
+                                   'Shape Preserving': False},
                         'Subtract': {'Method': ['Ver', 'Hor'],
                                      'Settings': ['0', ''],
                                      'Function': filters.subtract_trace,
-                                     'Checkstate': 0}, 
+                                     'Checkstate': 0,
+                                     'In Place': True,
+                                     'Changes': 'Values',
+                                     'Uses Axes': False,
+                                     'Element-wise': False,
+                                     'Shape Preserving': True}, 
                         'Invert': {'Method': ['X','Y','Z'],
                                    'Settings': ['', ''],
                                    'Function': filters.invert,
-                                   'Checkstate': 0}} 
+                                   'Checkstate': 0,
+                                   'In Place': False,
+                                   'Changes': 'Method',
+                                   'Uses Axes': False,
+                                   'Element-wise': True,
+                                   'Shape Preserving': True}} 
     
     def __init__(self, name, method=None, settings=None, checkstate=None):
         self.name = name
@@ -1812,6 +2264,17 @@ class Filter:
             self.checkstate = default_settings[name]['Checkstate']
         self.function = default_settings[name]['Function']
         
+    def get_changes(self, n_arrays):
+        # Arrays ('Axes', 'Values' or 'All') that the filter changes in data
+        # with n_arrays arrays; Y is the values of data with two arrays
+        changes = self.DEFAULT_SETTINGS[self.name]['Changes']
+        if changes == 'Method':
+            index = min({'X': 0, 'Y': 1, 'Z': 2}[self.method], n_arrays-1)
+            changes = 'Values' if index == n_arrays-1 else 'Axes'
+        elif changes == 'Axes' and n_arrays == 2:
+            changes = 'All' # Swap XY swaps the axis and the values
+        return changes
+        
 
 class LineCutWindow(QtWidgets.QWidget):
     def __init__(self, parent):
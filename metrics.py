@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Inspectra-Gadget - Metrics of live tracking
+
+Counters, gauges and histograms of the refreshes of live plots, served on
+http://localhost:METRICS_PORT/metrics in the Prometheus text format, so that
+dashboards can show how far the plots are behind the measurements. The
+endpoint is only served if METRICS_PORT is set (e.g. to 9464).
+
+Author: Joeri de Bruijckere
+
+Last updated on Oct 16 2026
+
+"""
+
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+METRICS_PORT = None # Port of the metrics endpoint on localhost (e.g. 9464); None to disable it
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10) # Upper bounds (s)
+LAG_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 600) # Upper bounds (s)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    'inspectra_refresh_stage_seconds':
+        ('histogram', 'Time spent in a stage of a refresh (load, plot or draw)', LATENCY_BUCKETS),
+    'inspectra_ingest_lag_seconds':
+        ('histogram', 'Time between the last write to a file and showing its data', LAG_BUCKETS),
+    'inspectra_tick_delay_seconds':
+        ('histogram', 'Time between a live refresh being due and being started', LATENCY_BUCKETS),
+    'inspectra_rows_ingested_total':
+        ('counter', 'Number of rows of a tracked file that were shown', None),
+    'inspectra_dropped_ticks_total':
+        ('counter', 'Number of live refreshes that were missed because a refresh was late', None),
+    'inspectra_ingest_rate_rows':
+        ('gauge', 'Estimated number of rows per second written to a tracked file', None),
+    'inspectra_refresh_interval_seconds':
+        ('gauge', 'Interval between the live refreshes of a tracked file', None),
+    'inspectra_tracked_files':
+        ('gauge', 'Number of tracked files', None),
+}
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escape = lambda value: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{'+','.join(f'{key}="{escape(value)}"' for key, value in labels)+'}'
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0]*len(buckets) # observations of at most each bound
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def format(self, name, labels):
+        lines = [f'{name}_bucket{format_labels(labels+(("le", bound),))} {count}'
+                 for bound, count in zip(self.buckets, self.counts)]
+        lines.append(f'{name}_bucket{format_labels(labels+(("le", "+Inf"),))} {self.count}')
+        lines.append(f'{name}_sum{format_labels(labels)} {self.sum}')
+        lines.append(f'{name}_count{format_labels(labels)} {self.count}')
+        return lines
+
+
+class Metrics:
+    # Values of the metrics in METRICS for each combination of labels. The
+    # values are updated by the GUI and read by the endpoint thread.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {} # (name, labels) -> value or Histogram
+
+    def get_key(self, name, labels):
+        if name not in METRICS:
+            raise KeyError(f'unknown metric {name}')
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self.get_key(name, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0)+value
+
+    def set(self, name, value, **labels):
+        key = self.get_key(name, labels)
+        with self.lock:
+            self.values[key] = value
+
+    def observe(self, name, value, **labels):
+        key = self.get_key(name, labels)
+        with self.lock:
+            if key not in self.values:
+                self.values[key] = Histogram(METRICS[name][2])
+            self.values[key].observe(value)
+
+    def remove_gauges(self, **labels):
+        # Gauges of a file that is no longer tracked; counters and histograms
+        # are kept, since they only increase
+        labels = set(labels.items())
+        with self.lock:
+            self.values = {key: value for key, value in self.values.items()
+                           if METRICS[key[0]][0] != 'gauge' or not labels <= set(key[1])}
+
+    def format(self):
+        # Prometheus text format
+        lines = []
+        with self.lock:
+            for name, (metric_type, help_text, _) in METRICS.items():
+                series = sorted((labels, value) for (key, labels), value in self.values.items()
+                                if key == name)
+                if not series:
+                    continue
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for labels, value in series:
+                    if isinstance(value, Histogram):
+                        lines += value.format(name, labels)
+                    else:
+                        lines.append(f'{name}{format_labels(labels)} {value}')
+        return '\n'.join(lines)+'\n'
+
+
+class MetricsServer:
+    # Serves the metrics on localhost from a background thread
+    def __init__(self, metrics, port=None):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = metrics.format().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+        self.server = ThreadingHTTPServer(('127.0.0.1', port or METRICS_PORT), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
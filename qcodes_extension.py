@@ -10,7 +10,11 @@ Last updated on Nov 11 2020
 
 from PyQt5 import QtWidgets
 import numpy as np
+import sqlite3
 import main
+import data_reader
+
+RESULTS_TIMEOUT = 10 # Seconds to wait for the measurement that is writing to the database
 
 class QCodesData(main.BaseClassData):
     def __init__(self, filepath, canvas, dataset):
@@ -20,6 +24,29 @@ class QCodesData(main.BaseClassData):
                       f'({dataset.sample_name}) {dataset.run_timestamp()}')
         
     def get_column_data(self):
+        # New results of a running measurement are read directly from the 
+        # results table; the whole run is read with get_parameter_data if 
+        # that is not possible
+        if not hasattr(self, 'results_reader'):
+            try:
+                self.results_reader = ResultsReader(self.dataset)
+            except Exception as e:
+                print(f'Could not read results of run #{self.dataset.captured_run_id} '
+                      'incrementally...', e)
+                self.results_reader = None
+        column_data = None
+        if self.results_reader:
+            try:
+                column_data = self.results_reader.read()
+            except Exception as e:
+                print(f'Could not read new results of run #{self.dataset.captured_run_id}...', e)
+                self.results_reader = None
+        if column_data is None:
+            column_data = self.get_parameter_data()
+        self.measured_data_points = column_data.shape[0]
+        return column_data
+    
+    def get_parameter_data(self):
         dependent_par = self.dataset.dependent_parameters[0]
         data_dict = self.dataset.get_parameter_data(dependent_par)[dependent_par]
         pars = list(data_dict.keys())
@@ -30,7 +57,24 @@ class QCodesData(main.BaseClassData):
             column_data = np.column_stack((data_dict[pars[1]], 
                                            data_dict[pars[2]], 
                                            data_dict[pars[0]]))
-        return column_data
+        return data_reader.ColumnData(array=column_data)
+
+    def get_file_signature(self):
+        # New results may not change the database file itself (e.g. in WAL mode)
+        try:
+            return (self.dataset.number_of_results, self.dataset.completed)
+        except Exception:
+            return None
+
+    def get_modified_time(self):
+        # The time at which results were added is not stored
+        return None
+
+    def file_finished(self):
+        try:
+            return self.dataset.completed
+        except Exception:
+            return False
 
     def add_extension_actions(self, editor, menu):
         channel_menu = menu.addMenu('Select channel...')
@@ -44,4 +88,41 @@ class QCodesData(main.BaseClassData):
             self.index_dependent_parameter = self.dependent_parameters.index(signal.text())
             self.refresh_data()
             editor.update_plots()
-            editor.show_current_all()
\ No newline at end of file
+            editor.show_current_all()
+
+
+class ResultsReader:
+    # Reads the results of the first dependent parameter of a QCoDeS dataset
+    # and its setpoints from the results table in the database. Only rows 
+    # with an id larger than that of the last row read are queried, so that a
+    # running measurement is refreshed without reading the whole run.
+    def __init__(self, dataset):
+        dependent_par = dataset.dependent_parameters[0]
+        setpoint_pars = dataset.description.interdeps.dependencies[dependent_par]
+        # Same order of columns as in get_parameter_data
+        self.names = [par.name for par in setpoint_pars]+[dependent_par.name]
+        self.table_name = dataset.table_name
+        self.connection = sqlite3.connect(f'file:{dataset.path_to_db}?mode=ro', uri=True, 
+                                          timeout=RESULTS_TIMEOUT)
+        self.generation = next(data_reader.generations)
+        self.last_id = 0
+        self.n_rows = 0
+        self.columns = np.empty((data_reader.INITIAL_CAPACITY, len(self.names)))
+        
+    def read(self):
+        columns = ', '.join(f'"{name}"' for name in self.names)
+        rows = self.connection.execute(f'SELECT id, {columns} FROM "{self.table_name}" '
+                                       f'WHERE id > ? AND "{self.names[-1]}" IS NOT NULL '
+                                       'ORDER BY id', (self.last_id,)).fetchall()
+        if rows:
+            rows = np.array(rows, dtype=float)
+            n_rows = self.n_rows+len(rows)
+            if n_rows > len(self.columns):
+                new_columns = np.empty((max(2*len(self.columns), n_rows), len(self.names)))
+                new_columns[:self.n_rows] = self.columns[:self.n_rows]
+                self.columns = new_columns
+            self.columns[self.n_rows:n_rows] = rows[:,1:]
+            self.n_rows = n_rows
+            self.last_id = int(rows[-1,0])
+        return data_reader.ColumnData(array=self.columns[:self.n_rows], 
+                                      generation=self.generation)
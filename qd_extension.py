@@ -37,11 +37,14 @@ LABEL_DICT = {'source': ('Bias voltage', '(mV)'),
 
 class QdData(main.BaseClassData):
     
-    def __init__(self, filepath, canvas, metapath):
+    def __init__(self, filepath, canvas, metapath, meta=None):
         super().__init__(filepath, canvas)
         # Open meta file and set label
-        with open(metapath) as f:
-            self.meta = json.load(f) 
+        if meta is None:
+            with open(metapath) as f:
+                self.meta = json.load(f) 
+        else:
+            self.meta = json.loads(meta)
         dirname = os.path.basename(os.path.dirname(metapath))
         timestamp = self.meta['timestamp'].split(' ')[1]
         name = self.meta['name']
@@ -126,25 +129,31 @@ class QdData(main.BaseClassData):
                 print(f'Could not add channel {channel}...')      
     
     def prepare_data_for_plot(self, reload_data=False, refresh_unit_conversion=False):
+        # Only stages that were invalidated are done again (see BaseClassData)
+        if reload_data:
+            self.invalidate('raw')
         if not hasattr(self, 'raw_data') or not self.raw_data:
             self.load_and_reshape_data()
             self.set_default_channel()
             refresh_unit_conversion = True
-        elif reload_data:
+        elif 'raw' in self.invalid_stages:
             self.load_and_reshape_data()
         if self.raw_data:
-            self.copy_raw_to_processed_data()
-            self.process_four_terminal_data()
-            if self.rc_filter_correct:
-                self.correct_for_rcfilters()
-            if refresh_unit_conversion:
-                self.filters = []
-                self.reset_labels()
-                self.unit_conversion()
-            self.apply_all_filters()
-            self.update_progress()
+            if ('filters' in self.invalid_stages or refresh_unit_conversion or 
+                not getattr(self, 'processed_data', None)):
+                self.copy_raw_to_processed_data()
+                self.process_four_terminal_data()
+                if self.rc_filter_correct:
+                    self.correct_for_rcfilters()
+                if refresh_unit_conversion:
+                    self.filters = []
+                    self.reset_labels()
+                    self.unit_conversion()
+                self.apply_all_filters()
+                self.update_progress()
         else:
             self.processed_data = None
+        self.invalid_stages.clear()
         
     def set_measurement_bounds(self, rescale=1, offset=0):
         # Get bounds to be able to show full range during measurement
@@ -176,6 +185,27 @@ class QdData(main.BaseClassData):
         if 'points' in self.meta['job']['job']:
             self.total_data_points *= self.meta['job']['job']['points']
     
+    def get_required_columns(self):
+        # Also parse the channels used by the default channel, the RC-filter 
+        # correction and the four-terminal processing
+        required_columns = super().get_required_columns()
+        columns = self.get_columns()
+        related_channels = {'source': ['dc_curr'], 
+                            'lockin_curr/X': [],
+                            'lockin_bias/X': ['lockin_curr/X']}
+        for channel in [self.channels[x] for x in columns if x < len(self.channels)]:
+            required_columns += [self.channels.index(related_channel) 
+                                 for related_channel in related_channels.get(channel, [])
+                                 if related_channel in self.channels]
+        if DEFAULT_CHANNEL in self.channels:
+            required_columns.append(self.channels.index(DEFAULT_CHANNEL))
+        return required_columns
+    
+    def get_filter_input_key(self):
+        # The RC-filter correction is applied before the filters
+        return super().get_filter_input_key()+(self.rc_filter_correct, 
+                                               self.settings['rc-filter'])
+    
     def correct_for_rcfilters(self):
         columns = self.get_columns()
         if 'source' in self.channels and 'dc_curr' in self.channels:
@@ -188,7 +218,10 @@ class QdData(main.BaseClassData):
                     source_data = self.raw_data[source_index] / source_divider
                     curr_data = self.raw_data[curr_index] / curr_amp
                     source_corrected = (source_data - float(self.settings['rc-filter'])*curr_data)*source_divider
-                    self.processed_data[columns.index(source_index)] = np.copy(source_corrected)
+                    # Points of an unfinished sweep have no current yet
+                    source_corrected = np.where(np.isnan(curr_data), self.raw_data[source_index],
+                                                source_corrected)
+                    self.processed_data[columns.index(source_index)] = source_corrected
             except Exception as e:
                 print('Could not perform rc-filter correction for source...', e)
         
@@ -206,7 +239,7 @@ class QdData(main.BaseClassData):
                     lockin_data = self.raw_data[lockin_index]/conversion # in Siemens
                     series_resistance = float(self.settings['rc-filter']) # in Ohm
                     lockin_corrected = lockin_data/(1.-series_resistance*lockin_data)*conversion
-                    self.processed_data[columns.index(lockin_index)] = np.copy(lockin_corrected)
+                    self.processed_data[columns.index(lockin_index)] = lockin_corrected
             except Exception as e:
                 print('Could not perform rc-filter correction for lockin_curr/X...', e)
 
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Inspectra-Gadget - Scheduling of live refreshes
+
+Author: Joeri de Bruijckere
+
+Last updated on Oct 16 2026
+
+"""
+
+import time
+from PyQt5 import QtCore
+
+SMOOTHING = 0.3 # Weight of the newest measurement in the estimates of data rate and refresh cost
+
+
+class RefreshScheduler:
+    # Chooses the interval between refreshes of a live plot. New rows should
+    # be shown within max_lag seconds, but there is no need to refresh more
+    # often than rows arrive, and at most max_cpu_fraction of the time is
+    # spent on refreshing. The arrival rate of rows and the cost of a refresh
+    # are estimated from previous refreshes.
+    def __init__(self, max_lag, max_cpu_fraction, min_interval):
+        self.max_lag = max_lag
+        self.max_cpu_fraction = max_cpu_fraction
+        self.min_interval = min_interval
+        self.rate = None # rows per second
+        self.cost = 0 # seconds per refresh that loaded new rows
+        self.last_time = None
+        self.last_rows = None
+
+    def update(self, n_rows, cost, now=None):
+        # Update the estimates after a refresh that showed n_rows rows and
+        # took cost seconds, and return the interval until the next refresh
+        now = time.monotonic() if now is None else now
+        if self.last_rows is None or n_rows < self.last_rows: # new or replaced file
+            self.rate = None
+        elif now > self.last_time:
+            rate = (n_rows-self.last_rows)/(now-self.last_time)
+            self.rate = rate if self.rate is None else SMOOTHING*rate+(1-SMOOTHING)*self.rate
+        if n_rows != self.last_rows: # refreshes without new rows are cheap
+            self.cost = cost if not self.cost else SMOOTHING*cost+(1-SMOOTHING)*self.cost
+        self.last_time, self.last_rows = now, n_rows
+        return self.get_interval()
+
+    def get_interval(self):
+        interval = self.max_lag
+        if self.rate:
+            interval = min(interval, 1/self.rate)
+        return max(interval, self.cost/self.max_cpu_fraction, self.min_interval)
+
+
+class TrackedItem:
+    def __init__(self, item, scheduler):
+        self.item = item
+        self.scheduler = scheduler
+        self.due_time = time.monotonic()
+
+
+class LiveTracker:
+    # Refreshes a set of tracked items, each at the interval chosen by its own
+    # RefreshScheduler. Items that are due at about the same time are passed
+    # to refresh_items together, so that the canvas is drawn once per tick.
+    # Late ticks are recorded in metrics (see metrics.py), if given.
+    def __init__(self, refresh_items, max_lag, max_cpu_fraction, min_interval, metrics=None):
+        self.refresh_items = refresh_items
+        self.metrics = metrics
+        self.max_lag = max_lag
+        self.max_cpu_fraction = max_cpu_fraction
+        self.min_interval = min_interval
+        self.tracked_items = []
+        self.timer = QtCore.QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.tick)
+
+    def get_items(self):
+        return [tracked_item.item for tracked_item in self.tracked_items]
+
+    def is_tracked(self, item):
+        return any(item is tracked_item.item for tracked_item in self.tracked_items)
+
+    def add(self, item):
+        if not self.is_tracked(item):
+            scheduler = RefreshScheduler(self.max_lag, self.max_cpu_fraction, self.min_interval)
+            self.tracked_items.append(TrackedItem(item, scheduler))
+            self.schedule()
+
+    def remove(self, item):
+        self.tracked_items = [tracked_item for tracked_item in self.tracked_items 
+                              if tracked_item.item is not item]
+        self.schedule()
+
+    def schedule(self):
+        if self.tracked_items:
+            due_time = min(tracked_item.due_time for tracked_item in self.tracked_items)
+            self.timer.start(max(0, int((due_time-time.monotonic())*1000)))
+        else:
+            self.timer.stop()
+
+    def tick(self):
+        # Items that are due within half the minimum interval are refreshed now
+        due_items = [tracked_item for tracked_item in self.tracked_items
+                     if tracked_item.due_time <= time.monotonic()+self.min_interval/2]
+        if self.metrics:
+            self.record_delays(due_items)
+        start_time = time.perf_counter()
+        self.refresh_items([tracked_item.item for tracked_item in due_items])
+        cost = (time.perf_counter()-start_time)/max(1, len(due_items))
+        now = time.monotonic()
+        for tracked_item in due_items:
+            n_rows = getattr(tracked_item.item.data, 'measured_data_points', 0)
+            tracked_item.due_time = now+tracked_item.scheduler.update(n_rows, cost, now)
+        self.schedule()
+
+    def record_delays(self, due_items):
+        # A refresh that is more than an interval late replaces the refreshes
+        # that were missed in the meantime
+        now = time.monotonic()
+        for tracked_item in due_items:
+            delay = max(0, now-tracked_item.due_time)
+            interval = tracked_item.scheduler.get_interval()
+            self.metrics.observe('inspectra_tick_delay_seconds', delay)
+            if delay >= interval:
+                self.metrics.inc('inspectra_dropped_ticks_total', int(delay/interval))
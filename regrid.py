@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Inspectra-Gadget - Regridding of scattered (x, y, z) data
+
+Author: Joeri de Bruijckere
+
+Last updated on Oct 16 2026
+
+"""
+
+import numpy as np
+from scipy.spatial import Delaunay, QhullError
+
+REGRID_METHODS = ['bin', 'interpolate']
+REGRID_MAX_POINTS = 1000 # Maximum number of grid points along each axis
+
+
+class Regridder:
+    # Maps scattered (x, y, z) points onto a regular grid, either by averaging
+    # the points in each grid cell ('bin') or by linear interpolation on a
+    # Delaunay triangulation ('interpolate'). The bin of each point, or the
+    # triangulation and the interpolation weights of the grid points, are
+    # kept, so that other channels and appended points reuse them.
+    def __init__(self, method='bin'):
+        self.method = method
+        self.n_points = 0
+        self.bounds = [np.inf, -np.inf, np.inf, -np.inf] # x_min, x_max, y_min, y_max
+        # Sweeps along y are counted from runs of steps in the same direction
+        self.n_sweeps = 0 # number of finished sweeps
+        self.direction = 0 # direction of the last step in y
+        self.run_length = 0 # number of steps in that direction
+        self.sweep_length = 1 # number of points of the longest sweep
+        self.shape = None
+        self.grid_bounds = None
+        self.indices = np.empty(0, dtype=np.intp) # bin of each point
+        self.triangulation = None
+        self.weights = None
+
+    def update(self, x, y):
+        # Process points that were added since the previous update
+        if len(x) < self.n_points:
+            self.__init__(self.method)
+        new_x, new_y = x[self.n_points:], y[self.n_points:]
+        if not len(new_x):
+            return
+        finite = np.isfinite(new_x) & np.isfinite(new_y)
+        if np.any(finite):
+            self.bounds = [min(self.bounds[0], np.min(new_x[finite])),
+                           max(self.bounds[1], np.max(new_x[finite])),
+                           min(self.bounds[2], np.min(new_y[finite])),
+                           max(self.bounds[3], np.max(new_y[finite]))]
+        self.count_sweeps(y[max(0, self.n_points-1):])
+        shape = (max(1, min(self.n_sweeps+(self.run_length > 1), REGRID_MAX_POINTS)),
+                 max(1, min(self.sweep_length, REGRID_MAX_POINTS)))
+        grid_changed = shape != self.shape or self.bounds != self.grid_bounds
+        self.shape, self.grid_bounds = shape, self.bounds.copy()
+        self.x, self.y = x, y
+        if self.method == 'interpolate':
+            self.update_triangulation(x, y, grid_changed)
+        if self.method == 'bin' or self.triangulation is None:
+            if grid_changed or len(self.indices) != self.n_points:
+                self.indices = self.get_indices(x, y)
+            else:
+                self.indices = np.concatenate((self.indices, self.get_indices(new_x, new_y)))
+        self.n_points = len(x)
+
+    def count_sweeps(self, y):
+        # Sweeps are runs of at least two steps in the same direction; a
+        # single step back is the return to the start of the next sweep
+        steps = np.sign(np.diff(y))
+        steps = steps[steps != 0]
+        if not steps.size:
+            return
+        run_ends = np.append(np.flatnonzero(np.diff(steps)), len(steps)-1)
+        run_lengths = np.diff(np.append(-1, run_ends))
+        if steps[0] == self.direction:
+            run_lengths[0] += self.run_length
+        elif self.run_length > 1:
+            self.n_sweeps += 1
+            self.sweep_length = max(self.sweep_length, self.run_length+1)
+        finished = run_lengths[:-1][run_lengths[:-1] > 1]
+        self.n_sweeps += len(finished)
+        self.sweep_length = max([self.sweep_length, run_lengths[-1]+1, *(finished+1)])
+        self.direction, self.run_length = steps[-1], run_lengths[-1]
+
+    def get_grid(self):
+        x_min, x_max, y_min, y_max = self.grid_bounds
+        return np.meshgrid(np.linspace(x_min, x_max, self.shape[0]),
+                           np.linspace(y_min, y_max, self.shape[1]), indexing='ij')
+
+    def get_indices(self, x, y):
+        # Index of the nearest grid point in the flattened grid
+        x_min, x_max, y_min, y_max = self.grid_bounds
+        n_x, n_y = self.shape
+        with np.errstate(invalid='ignore', divide='ignore'):
+            i_x = np.rint((x-x_min)/(x_max-x_min)*(n_x-1)) if x_max > x_min else np.zeros(len(x))
+            i_y = np.rint((y-y_min)/(y_max-y_min)*(n_y-1)) if y_max > y_min else np.zeros(len(y))
+        indices = i_x*n_y+i_y
+        indices[~np.isfinite(indices)] = -1
+        return indices.astype(np.intp)
+
+    def update_triangulation(self, x, y, grid_changed):
+        # Points are scaled by the ranges of x and y, so that triangles are 
+        # not skewed by the units of x and y. The triangulation is only made 
+        # again if a range has more than doubled since it was made.
+        x_min, x_max, y_min, y_max = self.grid_bounds
+        scale = (x_max-x_min or 1, y_max-y_min or 1)
+        if (self.triangulation is None or scale[0] > 2*self.scale[0] or 
+            scale[1] > 2*self.scale[1]):
+            self.triangulation = None
+            self.scale = scale
+        points = np.column_stack((x/self.scale[0], y/self.scale[1]))
+        points = points[np.all(np.isfinite(points), axis=1)]
+        try:
+            if self.triangulation is None:
+                self.triangulation = Delaunay(points, incremental=True)
+            elif len(points) > self.triangulation.npoints:
+                self.triangulation.add_points(points[self.triangulation.npoints:])
+            elif not grid_changed and self.weights is not None:
+                return
+            self.finite = np.all(np.isfinite(np.column_stack((x, y))), axis=1)
+        except (QhullError, ValueError): # e.g. all points on a line
+            self.triangulation = None
+            return
+        # Interpolation weights of the grid points in their triangles
+        grid_points = np.column_stack([grid.ravel()/scale for grid, scale 
+                                       in zip(self.get_grid(), self.scale)])
+        simplices = self.triangulation.find_simplex(grid_points)
+        transform = self.triangulation.transform[simplices]
+        barycentric = np.einsum('ijk,ik->ij', transform[:,:2], grid_points-transform[:,2])
+        self.weights = np.column_stack((barycentric, 1-barycentric.sum(axis=1)))
+        self.vertices = self.triangulation.simplices[simplices]
+        self.outside = simplices == -1
+
+    def regrid(self, z):
+        # Returns z on the grid, with NaN where there is no data
+        z = z[:self.n_points]
+        if self.method == 'interpolate' and self.triangulation is not None:
+            values = np.einsum('ij,ij->i', z[self.finite][self.vertices], self.weights)
+            values[self.outside] = np.nan
+            return np.reshape(values, self.shape)
+        valid = (self.indices >= 0) & np.isfinite(z)
+        size = self.shape[0]*self.shape[1]
+        counts = np.bincount(self.indices[valid], minlength=size)
+        sums = np.bincount(self.indices[valid], weights=z[valid], minlength=size)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.reshape(sums/counts, self.shape)
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Inspectra-Gadget - Stand-in for a running measurement
+
+Writes a synthetic measurement to a data file at a given rate, so that live
+tracking can be tried and benchmarked without instruments (see the soak
+benchmark in benchmarks.py). Run e.g. 'python simulator.py folder --qd' to
+write a Matlab qd measurement (data.dat and meta.json) into folder.
+
+Author: Joeri de Bruijckere
+
+Last updated on Oct 16 2026
+
+"""
+
+import os
+import sys
+import json
+import time
+import bisect
+import argparse
+import threading
+from datetime import datetime
+import numpy as np
+
+SIMULATOR_WRITE_INTERVAL = 0.05 # Seconds between writes of new rows
+QD_CHANNELS = ['bg', 'source', 'dc_curr', 'lockin_curr/X'] # Columns of simulated qd data
+
+
+def make_rows(start, stop, n_columns, n_sweeps, sweep_length, seed=0):
+    # Rows start to stop of a measurement of sweeps of the second column
+    # (fast) at values of the first column (slow); the other columns are a
+    # conductance-like signal with noise. Data with 2 columns is a log of a
+    # signal against the row index.
+    rng = np.random.default_rng(seed+start)
+    index = np.arange(start, stop)
+    if n_columns == 2:
+        x = index.astype(float)
+        y = np.sin(2*np.pi*index/max(1, sweep_length))
+        return np.column_stack([x, y+0.1*rng.normal(size=len(index))])
+    x = np.linspace(-1, 1, max(2, n_sweeps))[index//sweep_length]
+    y = np.linspace(-2, 2, max(2, sweep_length))[index%sweep_length]
+    signal = 1/(1+(5*(y-0.5*x))**2)
+    columns = [x, y]+[signal*(i+1)+0.01*rng.normal(size=len(index))
+                      for i in range(n_columns-2)]
+    return np.column_stack(columns)
+
+def make_qd_meta(name, n_sweeps, sweep_length):
+    # meta.json contents with the entries that QdData reads
+    return {'name': name,
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'columns': [{'name': channel} for channel in QD_CHANNELS],
+            'setup': {'channels': ['bg', 'source', 'dc_curr', 'lockin_curr'],
+                      'meta': {'source_divider': 1000, 'current_amp': 1e7,
+                               'lock_sig_divider': 1e4, 'bias_amp': 1e7}},
+            'register': {'instruments': [{'name': 'dac', 'current_values': [0.0]*16},
+                                         {'name': 'lockin_curr', 'config': {'SLVL': '0.1'}}],
+                         'channels': [{'name': 'bg', 'instrument': 'dac', 'channel_id': 0},
+                                      {'name': 'source', 'instrument': 'dac', 'channel_id': 1}]},
+            'job': {'from': -1, 'to': 1, 'points': n_sweeps, 'chans': ['bg'],
+                    'job': {'from': -2, 'to': 2, 'points': sweep_length,
+                            'chans': ['source']}}}
+
+
+class MeasurementSimulator:
+    # Appends rows to a file from a background thread at the given rate (rows
+    # per second) until n_sweeps sweeps have been written or stop is called.
+    # The time at which each row was written is kept to determine how long it
+    # took before a row was shown.
+    def __init__(self, filepath, n_columns=4, rate=100, n_sweeps=100, sweep_length=100,
+                 delimiter=' ', seed=0):
+        self.filepath = filepath
+        self.n_columns = n_columns
+        self.rate = rate
+        self.n_sweeps = n_sweeps
+        self.sweep_length = sweep_length
+        self.delimiter = delimiter
+        self.seed = seed
+        self.n_written = 0
+        self.write_counts = [] # numbers of rows written after each write
+        self.write_times = [] # time.monotonic() of each write
+        self.stop_event = threading.Event()
+        self.thread = None
+        open(self.filepath, 'w').close()
+
+    def get_total_rows(self):
+        return self.n_sweeps*self.sweep_length
+
+    def write_rows(self, n_rows):
+        stop = min(self.n_written+n_rows, self.get_total_rows())
+        if stop > self.n_written:
+            rows = make_rows(self.n_written, stop, self.n_columns, self.n_sweeps,
+                             self.sweep_length, self.seed)
+            with open(self.filepath, 'a') as f:
+                np.savetxt(f, rows, delimiter=self.delimiter, fmt='%.8g')
+            self.n_written = stop
+            self.write_counts.append(stop)
+            self.write_times.append(time.monotonic())
+
+    def get_write_time(self, row):
+        # Time at which the row with the given index was written, or None
+        index = bisect.bisect_right(self.write_counts, row)
+        return self.write_times[index] if index < len(self.write_times) else None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        start_time, start_rows = time.monotonic(), self.n_written
+        while (self.n_written < self.get_total_rows() and
+               not self.stop_event.wait(SIMULATOR_WRITE_INTERVAL)):
+            target = start_rows+int(self.rate*(time.monotonic()-start_time))
+            self.write_rows(target-self.n_written)
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+
+    def finished(self):
+        return self.n_written >= self.get_total_rows()
+
+
+def create_qd_measurement(folder, name='simulated', rate=100, n_sweeps=100,
+                          sweep_length=100, seed=0):
+    # A simulated Matlab qd measurement in folder
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, 'meta.json'), 'w') as f:
+        json.dump(make_qd_meta(name, n_sweeps, sweep_length), f, indent=2)
+    return MeasurementSimulator(os.path.join(folder, 'data.dat'), len(QD_CHANNELS),
+                                rate, n_sweeps, sweep_length, '\t', seed)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a simulated measurement')
+    parser.add_argument('path', help='folder of a qd measurement (with --qd) or data file')
+    parser.add_argument('--qd', action='store_true', help='write data.dat and meta.json')
+    parser.add_argument('--rate', type=float, default=100, help='rows per second')
+    parser.add_argument('--sweeps', type=int, default=100, help='number of sweeps')
+    parser.add_argument('--sweep-length', type=int, default=100, help='rows per sweep')
+    parser.add_argument('--columns', type=int, default=4,
+                        help='number of columns of a data file (2 for a log)')
+    parser.add_argument('--delimiter', default=' ')
+    args = parser.parse_args(argv)
+    if args.qd:
+        simulator = create_qd_measurement(args.path, os.path.basename(args.path), args.rate,
+                                          args.sweeps, args.sweep_length)
+    else:
+        simulator = MeasurementSimulator(args.path, args.columns, args.rate, args.sweeps,
+                                         args.sweep_length, args.delimiter)
+    print(f'Writing {simulator.get_total_rows()} rows to {simulator.filepath}...')
+    simulator.start()
+    try:
+        while simulator.thread.is_alive():
+            simulator.thread.join(0.5)
+    except KeyboardInterrupt:
+        simulator.stop()
+    print(f'Wrote {simulator.n_written} rows')
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import os
+
+import numpy as np
+
+import data_reader
+
+
+def write(path, text, mode='a'):
+    with open(path, mode) as f:
+        f.write(text)
+
+def test_half_written_first_line_does_not_set_columns(tmp_path):
+    path = tmp_path / 'data.dat'
+    write(path, '1 0.5', 'w')
+    reader = data_reader.TailReader(str(path), use_cache=False)
+    column_data = reader.read()
+    assert reader.n_columns is None
+    assert column_data.shape == (0, 0)
+    write(path, ' 2\n3 4 5\n6 7')
+    column_data = reader.read()
+    assert column_data.shape == (2, 3)
+    np.testing.assert_array_equal(column_data.column(2), [2, 5])
+    write(path, ' 8\n')
+    column_data = reader.read()
+    assert column_data.shape == (3, 3)
+    np.testing.assert_array_equal(column_data.column(2), [2, 5, 8])
+
+def test_last_line_without_newline_is_held_back(tmp_path):
+    path = tmp_path / 'data.dat'
+    write(path, '0.1,0.2,0.3\n0.42,-1.24,-', 'w')
+    reader = data_reader.TailReader(str(path), delimiter=',', use_cache=False)
+    column_data = reader.read()
+    assert column_data.shape == (1, 3)
+    np.testing.assert_array_equal(column_data.column(2), [0.3])
+    # a number that is being written parses, but is not shown either
+    write(path, '0.7\n0.5,0.6,1.2')
+    column_data = reader.read()
+    assert column_data.shape == (2, 3)
+    np.testing.assert_array_equal(column_data.column(2), [0.3, -0.7])
+    write(path, '345e-9\n')
+    column_data = reader.read()
+    assert column_data.shape == (3, 3)
+    np.testing.assert_array_equal(column_data.column(2), [0.3, -0.7, 1.2345e-9])
+
+def test_last_line_without_newline_of_finished_file_is_shown(tmp_path):
+    path = tmp_path / 'data.dat'
+    write(path, '1 2 3\n4 5 6\n7 8 9', 'w')
+    reader = data_reader.TailReader(str(path), use_cache=False)
+    assert reader.read().shape == (2, 3)
+    column_data = reader.read(finished=True)
+    assert column_data.shape == (3, 3)
+    np.testing.assert_array_equal(column_data.column(2), [3, 6, 9])
+    # files that were not modified for a while are finished
+    os.utime(path, (0, 0))
+    reader = data_reader.TailReader(str(path), use_cache=False)
+    np.testing.assert_array_equal(reader.read().column(2), [3, 6, 9])
+    # unless the last line is incomplete
+    write(path, '0.1 0.2', 'w')
+    os.utime(path, (0, 0))
+    reader = data_reader.TailReader(str(path), use_cache=False)
+    assert reader.read().shape == (0, 0)
+
+def test_3d_columns_of_2d_data_are_reshaped_again():
+    # Data of a single sweep (x changes every row) is 2D, also when three
+    # columns are requested again
+    array = np.column_stack([np.arange(10.), np.linspace(0, 1, 10), np.arange(10.)**2])
+    column_data = data_reader.ColumnData(array=array, generation=0)
+    reshaper = data_reader.GridReshaper([0,1,2])
+    reshaper.reshape(column_data, [0,1,2])
+    assert reshaper.columns == [0,1]
+    assert reshaper.is_valid(column_data, [0,1,2])
+    raw_data = reshaper.reshape(column_data, [0,1,2])
+    assert reshaper.columns == [0,1]
+    np.testing.assert_array_equal(raw_data[1], array[:,1])
+
+def test_sweeps_of_setpoints_with_jitter_are_found():
+    rng = np.random.default_rng(0)
+    x = np.repeat(np.arange(5.), 20) + 0.01*rng.standard_normal(100)
+    y = np.tile(np.linspace(0, 1, 20), 5)
+    array = np.column_stack([x, y, x+y])
+    # fewer than two sweeps have finished, so the dimension is not known yet
+    reshaper = data_reader.GridReshaper([0,1,2])
+    raw_data = reshaper.reshape(data_reader.ColumnData(array=array[:30], generation=0), [0,1,2])
+    assert reshaper.dimension is None
+    assert raw_data[2].shape == (2, 30)
+    raw_data = reshaper.reshape(data_reader.ColumnData(array=array, generation=0), [0,1,2])
+    assert (reshaper.sweep_length, reshaper.dimension) == (20, 3)
+    assert reshaper.irregular
+    assert raw_data[2].shape == (5, 20)
+    # without regridding, the sweeps are the rows of the grid
+    reshaper = data_reader.GridReshaper([0,1,2], 'False')
+    raw_data = reshaper.reshape(data_reader.ColumnData(array=array, generation=0), [0,1,2])
+    np.testing.assert_array_equal(raw_data[0], np.reshape(x, (5, 20)))
+    # the x-value of 2D data is not a setpoint with jitter
+    array[:,0] = np.arange(100.)
+    reshaper = data_reader.GridReshaper([0,1,2])
+    reshaper.reshape(data_reader.ColumnData(array=array, generation=0), [0,1,2])
+    assert reshaper.dimension == 2
+
+def make_sweeps(n_sweeps, sweep_length, n_rows=None, snake=False):
+    # Columns x (slow), y (fast) and z = 10x+y of a raster measurement
+    x = np.repeat(np.arange(float(n_sweeps)), sweep_length)
+    y = np.tile(np.arange(float(sweep_length)), n_sweeps)
+    if snake:
+        y = np.reshape(y, (n_sweeps, sweep_length))
+        y[1::2] = y[1::2,::-1]
+        y = y.ravel()
+    return np.column_stack([x, y, 10*x+y])[:n_rows]
+
+def reshape(array, columns):
+    reshaper = data_reader.GridReshaper(columns)
+    raw_data = reshaper.reshape(data_reader.ColumnData(array=array, generation=0), columns)
+    return reshaper, raw_data
+
+def test_finished_sweeps_are_reshaped_into_a_grid():
+    reshaper, raw_data = reshape(make_sweeps(4, 5), [0,1,2])
+    assert (reshaper.sweep_length, reshaper.dimension, reshaper.columns) == (5, 3, [0,1,2])
+    np.testing.assert_array_equal(raw_data[0], np.repeat(np.arange(4.)[:,None], 5, axis=1))
+    np.testing.assert_array_equal(raw_data[2], 10*np.arange(4.)[:,None]+np.arange(5.))
+
+def test_unfinished_last_sweep_is_padded():
+    reshaper, raw_data = reshape(make_sweeps(4, 5, n_rows=17), [0,1,2])
+    assert (reshaper.sweep_length, reshaper.dimension) == (5, 3)
+    np.testing.assert_array_equal(raw_data[0][3], [3, 3, 3, 3, 3])
+    np.testing.assert_array_equal(raw_data[1][3], [0, 1, 2, 3, 4])
+    np.testing.assert_array_equal(raw_data[2][3], [30, 31, np.nan, np.nan, np.nan])
+
+def test_sweeps_of_snake_scans_keep_their_order():
+    reshaper, raw_data = reshape(make_sweeps(4, 5, snake=True), [0,1,2])
+    assert (reshaper.sweep_length, reshaper.dimension) == (5, 3)
+    assert not reshaper.irregular
+    np.testing.assert_array_equal(raw_data[1][:2], [[0, 1, 2, 3, 4], [4, 3, 2, 1, 0]])
+    np.testing.assert_array_equal(raw_data[2][1], [14, 13, 12, 11, 10])
+
+def test_single_sweep_is_tiled():
+    reshaper, raw_data = reshape(make_sweeps(1, 5), [0,1,2])
+    assert reshaper.sweep_length is None and reshaper.dimension is None
+    np.testing.assert_array_equal(raw_data[0], [[-1]*5, [1]*5])
+    np.testing.assert_array_equal(raw_data[2], [np.arange(5.)]*2)
+
+def test_simultaneously_swept_column_is_skipped():
+    array = make_sweeps(4, 5)
+    array = np.column_stack([array[:,0], 0.5*array[:,0]+3, array[:,1:]])
+    reshaper, raw_data = reshape(array, [0,1,2])
+    assert (reshaper.dimension, reshaper.columns) == (3, [0,2,3])
+    np.testing.assert_array_equal(raw_data[3], 10*np.arange(4.)[:,None]+np.arange(5.))
+
+def test_2_column_data_is_not_reshaped():
+    array = make_sweeps(4, 5)[:,[0,2]]
+    reshaper, raw_data = reshape(array, [0,1])
+    assert (reshaper.dimension, reshaper.columns) == (2, [0,1])
+    np.testing.assert_array_equal(raw_data[1], array[:,1])
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Inspectra-Gadget - Worker processes and threads
+
+Author: Joeri de Bruijckere
+
+Last updated on Oct 16 2026
+
+"""
+
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from PyQt5 import QtCore
+
+OPEN_WORKERS = os.cpu_count() or 1 # Number of processes that open files
+PARSE_DATA_ON_OPEN = False # Also parse the data in the workers, so that large files are cached (see data_cache.py)
+
+
+def open_data_file(filepath, parse_data=PARSE_DATA_ON_OPEN):
+    # Runs in a worker process. Returns the data object without canvas; it is
+    # pickled and set up in the main process.
+    import main
+    import data_reader
+    data = main.create_data(filepath)
+    if parse_data:
+        data_reader.TailReader(filepath, data.settings['delimiter']).read()
+    return data
+
+
+class FileOpener:
+    # Opens files in a pool of worker processes. Finished results are
+    # collected in the order of the file paths with get_results().
+    def __init__(self, filepaths, workers=OPEN_WORKERS):
+        self.filepaths = list(filepaths)
+        self.n_done = 0
+        # Worker processes are spawned rather than forked from the GUI process
+        self.executor = ProcessPoolExecutor(max_workers=min(workers, len(self.filepaths)),
+                                            mp_context=multiprocessing.get_context('spawn'))
+        self.futures = [self.executor.submit(open_data_file, filepath)
+                        for filepath in self.filepaths]
+
+    def get_results(self):
+        # Returns (filepath, data or exception) of the files that finished
+        # since the previous call, up to the first file that did not finish
+        results = []
+        while self.n_done < len(self.futures) and self.futures[self.n_done].done():
+            future = self.futures[self.n_done]
+            if not future.cancelled():
+                results.append((self.filepaths[self.n_done], future.exception() or future.result()))
+            self.n_done += 1
+        if self.finished():
+            self.executor.shutdown(wait=False)
+        return results
+
+    def add(self, filepaths):
+        # Files are added to the pool of an opener that has not finished, and
+        # returned after the files that were added before
+        self.filepaths += filepaths
+        self.futures += [self.executor.submit(open_data_file, filepath)
+                         for filepath in filepaths]
+
+    def finished(self):
+        return self.n_done == len(self.futures)
+
+    def cancel(self):
+        # Files that are being opened are still returned by get_results()
+        for future in self.futures:
+            future.cancel()
+
+
+class DataLoader(QtCore.QObject):
+    # Prepares data for plotting in a background thread, one item at a time.
+    # Loads of items that are no longer wanted (e.g. when the user moved on to
+    # the next file) are skipped if they have not started yet.
+    loaded = QtCore.pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.lock = threading.Lock()
+        self.pending_items = []
+        self.wanted_items = []
+
+    def set_wanted_items(self, items):
+        self.wanted_items = list(items)
+
+    def is_pending(self, item):
+        with self.lock:
+            return any(item is pending_item for pending_item in self.pending_items)
+
+    def load(self, item):
+        with self.lock:
+            if any(item is pending_item for pending_item in self.pending_items):
+                return
+            self.pending_items.append(item)
+        self.executor.submit(self.run, item)
+
+    def run(self, item):
+        try:
+            if any(item is wanted_item for wanted_item in self.wanted_items):
+                item.data.prepare_data_for_plot()
+        except Exception as e:
+            print(f'Could not load {item.data.filepath}...', e)
+            item.data.processed_data = None
+        finally:
+            with self.lock:
+                self.pending_items = [pending_item for pending_item in self.pending_items 
+                                      if pending_item is not item]
+            self.loaded.emit(item)